@@ -0,0 +1,2 @@
+from .corpus import make_corpus
+from .run import benchmark, compare, measure
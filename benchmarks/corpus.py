@@ -0,0 +1,101 @@
+from random import Random
+
+WORDS = '''
+lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor
+incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud
+exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute
+'''.split()
+
+INLINE = ['em', 'i', 'strong', 'sup', 'sub']
+
+def words(rng: Random, n: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+def prose(rng: Random, size: int, *, density: float=0.02) -> str:
+    # Long paragraphs of plain text with the occasional inline node or link
+    pieces = []
+    length = 0
+    while length < size:
+        if rng.random() < density:
+            if rng.random() < 0.2:
+                piece = f'$link[{rng.choice(WORDS)}.html]{{{words(rng, 2)}}}'
+            else:
+                piece = f'${rng.choice(INLINE)}{{{words(rng, rng.randint(1, 4))}}}'
+        elif rng.random() < 0.01:
+            piece = '\n\n'
+        else:
+            piece = rng.choice(WORDS)
+        pieces.append(piece)
+        length += len(piece) + 1
+    return ' '.join(pieces)
+
+
+def nested(rng: Random, depth: int, *, width: int=3) -> str:
+    # A chain of $div nodes, each with some text around the next one
+    head = ''.join(f'$div{{{words(rng, rng.randint(0, width))} ' for _ in range(depth))
+    return head + words(rng, width) + '}' * depth
+
+
+def table(rng: Random, rows: int, cols: int, *, merges: float=0.2) -> str:
+    # Cells are laid out in 2x2 blocks, some merged across (<), down (^) or
+    # both (^ with . continuing it), so every merge is valid
+    grid = [[words(rng, rng.randint(1, 3)) for _ in range(cols)] for _ in range(rows)]
+    for r in range(0, rows-1, 2):
+        for c in range(0, cols-1, 2):
+            choice = rng.random()
+            if choice < merges / 2:
+                grid[r][c+1], grid[r+1][c], grid[r+1][c+1] = '<', '^', '.'
+            elif choice < merges:
+                grid[r][c+1] = '<'
+            elif choice < merges * 1.5:
+                grid[r+1][c] = '^'
+    body = ' /\n'.join(' | '.join(row) for row in grid)
+    return f'$table[headers=rows,cols]{{{words(rng, 4)} // {body}}}'
+
+
+def lists(rng: Random, items: int) -> str:
+    # One long $list and one long $describe with several descriptions per term
+    items_ = ' / '.join(words(rng, rng.randint(2, 8)) for _ in range(items))
+    terms = ' / '.join(
+        ' | '.join(words(rng, rng.randint(1, 6)) for _ in range(rng.randint(2, 4)))
+        for _ in range(items)
+    )
+    return f'$list{{{items_}}}\n$describe{{{terms}}}'
+
+
+ESCAPES = ['\\\\', '\\$', '\\{', '\\}', '\\/', '\\|', '\\"', '\\n', '\\ ']
+
+def escaped(rng: Random, size: int, *, density: float=0.3) -> str:
+    # Text where a large share of the characters are escapes, partly inside nodes
+    pieces = []
+    length = 0
+    while length < size:
+        if rng.random() < density:
+            piece = ''.join(rng.choice(ESCAPES) for _ in range(rng.randint(1, 4)))
+        elif rng.random() < 0.05:
+            piece = f'$p{{{rng.choice(ESCAPES)}{rng.choice(WORDS)}{rng.choice(ESCAPES)}}}'
+        else:
+            piece = rng.choice(WORDS)
+        pieces.append(piece)
+        length += len(piece) + 1
+    return ' '.join(pieces)
+
+
+def make_corpus(seed: int=0, scale: float=1) -> dict[str, str]:
+    # Every document is generated from its own generator, so adding a document
+    # or changing one's size doesn't change the others
+    def rng(name: str) -> Random:
+        return Random(f'{seed}:{name}')
+
+    def n(value: int) -> int:
+        return max(1, int(value * scale))
+
+    return {
+        'prose': prose(rng('prose'), n(200_000)),
+        'deep_div': nested(rng('deep_div'), n(500)),
+        'wide_table': table(rng('wide_table'), n(20), n(200)),
+        'tall_table': table(rng('tall_table'), n(2000), n(6)),
+        'long_lists': lists(rng('long_lists'), n(5000)),
+        'escapes': escaped(rng('escapes'), n(100_000)),
+    }
@@ -0,0 +1,97 @@
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Optional
+from ..src.parse import Markup
+from .corpus import make_corpus
+
+PERCENTILES = (50, 90, 99)
+
+def measure(markup: Markup, source: str, *, repeat: int=10, depth: int=0) -> dict:
+    markup.parse(source, depth=depth)  # Warm up
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        markup.parse(source, depth=depth)
+        times.append(time.perf_counter() - start)
+
+    # Measured separately, since tracing slows parsing down
+    gc.collect()
+    tracemalloc.start()
+    try:
+        markup.parse(source, depth=depth)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    quantiles = statistics.quantiles(times, n=100, method='inclusive') if len(times) > 1 else times * 99
+    return {
+        'size': len(source),
+        'repeat': repeat,
+        'throughput': len(source) / statistics.median(times),  # Characters per second
+        'latency': {f'p{p}': quantiles[p-1] for p in PERCENTILES} | {'min': min(times), 'max': max(times)},
+        'peak_memory': peak,
+    }
+
+
+def benchmark(corpus: dict[str, str], *, repeat: int=10, markup: Optional[Markup]=None) -> dict:
+    markup = markup or Markup()
+    return {name: measure(markup, source, repeat=repeat) for name, source in corpus.items()}
+
+
+def compare(old: dict, new: dict) -> dict[str, dict[str, float]]:
+    # Ratios of new to old: above 1 is faster throughput, below 1 is lower latency and memory
+    return {
+        name: {
+            'throughput': result['throughput'] / old[name]['throughput'],
+            'p50': result['latency']['p50'] / old[name]['latency']['p50'],
+            'peak_memory': result['peak_memory'] / old[name]['peak_memory'],
+        }
+        for name, result in new.items() if name in old
+    }
+
+
+def main(argv: Optional[list[str]]=None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m markup.benchmarks', description='Benchmark Markup.parse on a generated corpus.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1, help='multiplies the size of every document')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--only', nargs='*', metavar='NAME', help='only run these documents')
+    parser.add_argument('--output', '-o', help='write results to this JSON file')
+    parser.add_argument('--compare', metavar='FILE', help='compare against results from an earlier run')
+    args = parser.parse_args(argv)
+
+    corpus = make_corpus(args.seed, args.scale)
+    if args.only:
+        corpus = {name: corpus[name] for name in args.only}
+    results = {
+        'seed': args.seed,
+        'scale': args.scale,
+        'python': sys.version,
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': benchmark(corpus, repeat=args.repeat),
+    }
+
+    for name, result in results['results'].items():
+        latency = result['latency']
+        print(
+            f'{name:<12} {result["size"]:>9,} chars  {result["throughput"]/1e6:8.3f} Mchar/s  '
+            f'p50 {latency["p50"]*1e3:9.2f} ms  p99 {latency["p99"]*1e3:9.2f} ms  '
+            f'peak {result["peak_memory"]/2**20:8.2f} MiB'
+        )
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)['results']
+        print()
+        for name, ratios in compare(old, results['results']).items():
+            print(f'{name:<12} throughput x{ratios["throughput"]:.3f}  p50 x{ratios["p50"]:.3f}  peak x{ratios["peak_memory"]:.3f}')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -1 +1,2 @@
 from .parse import Markup
+from .profiling import Profiler
@@ -0,0 +1,30 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Optional
+from . import batch
+from .parse import Markup
+
+class AsyncMarkup:
+    def __init__(self, markup: Markup, *, limit: int=4, threshold: int=10_000, executor: Optional[Executor]=None) -> None:
+        self.markup = markup
+        self.limit = limit  # Most parses running in the executor at once
+        self.threshold = threshold  # Shorter sources are parsed inline
+        # The loop's default executor if None. A process pool's workers are
+        # sent the markup's nodes and settings, as parse_many's are.
+        self.executor = executor
+        self._semaphore = None  # Created on first use, so bound to that event loop
+
+    async def parse(self, string: str, *, depth: int=0, **kwargs) -> str:
+        if len(string) < self.threshold:
+            return self.markup.parse(string, depth=depth, **kwargs)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        loop = asyncio.get_running_loop()
+        if isinstance(self.executor, ProcessPoolExecutor):
+            nodes = batch.describe_nodes(self.markup.nodes)
+            call = partial(batch.parse_one, nodes, self.markup._settings(), string, {'depth': depth} | kwargs)
+        else:
+            call = partial(self.markup.parse, string, depth=depth, **kwargs)
+        async with self._semaphore:
+            return await loop.run_in_executor(self.executor, call)
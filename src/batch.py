@@ -0,0 +1,102 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Optional, Union
+from . import nodes
+
+class BatchError(Exception):
+    def __init__(self, index: int, message: str) -> None:
+        self.index = index
+        self.message = message
+        super().__init__(index, message)
+
+    def __str__(self) -> str:
+        return f'document {self.index}: {self.message}'
+
+
+# Registries are sent to worker processes as descriptions, since the generated
+# simple node classes can't be pickled; built-in nodes are sent by name.
+NodeSpec = Union[tuple[str, str], type[nodes.Node]]
+
+def describe_nodes(registry: nodes.Nodes) -> dict[str, dict[str, NodeSpec]]:
+    builtins = {
+        cls: (prefix, command)
+        for prefix, table in nodes.make_nodes().items()
+        for command, cls in table.items()
+    }
+    return {
+        prefix: {command: builtins.get(cls, cls) for command, cls in table.items()}
+        for prefix, table in registry.items()
+    }
+
+
+def build_nodes(description: dict[str, dict[str, NodeSpec]]) -> nodes.Nodes:
+    builtins = nodes.make_nodes()
+    return {
+        prefix: {
+            command: builtins[spec[0]][spec[1]] if isinstance(spec, tuple) else spec
+            for command, spec in table.items()
+        }
+        for prefix, table in description.items()
+    }
+
+
+_markup = None
+_options = {}
+
+def _init_worker(description: dict[str, dict[str, NodeSpec]], settings: dict, options: dict) -> None:
+    from .parse import Markup
+
+    global _markup, _options
+    _markup = Markup(**settings)
+    _markup.nodes = build_nodes(description)
+    _options = options
+
+
+def _parse(item: tuple[int, str]) -> Union[str, BatchError]:
+    index, source = item
+    try:
+        return _markup.parse(source, **_options)
+    except Exception as e:
+        return BatchError(index, f'{type(e).__name__}: {e}')
+
+
+_setup = None
+
+def parse_one(description: dict[str, dict[str, NodeSpec]], settings: dict, source: str, options: dict) -> str:
+    # For pools not started with _init_worker, such as one given to
+    # AsyncMarkup: each worker is set up on its first call, and again if it's
+    # sent other nodes or settings
+    global _setup
+    if _setup != (description, settings):
+        _init_worker(description, settings, {})
+        _setup = (description, settings)
+    return _markup.parse(source, **options)
+
+
+def _parse_chunk(item: tuple[str, bool]) -> Optional[str]:
+    string, first = item
+    try:
+        return _markup._parse_chunk(string, first=first, **_options)
+    except Exception:
+        return None
+
+
+def parse_many(registry: nodes.Nodes, settings: dict, sources: Iterable[str], *, workers: Optional[int]=None, chunksize: Optional[int]=None, options: dict=None) -> list[Union[str, BatchError]]:
+    # `settings` are Markup's constructor arguments, `options` those of Markup.parse
+    return _map(_parse, enumerate(sources), registry, settings, options, workers=workers, chunksize=chunksize)
+
+
+def parse_chunks(registry: nodes.Nodes, settings: dict, chunks: list[str], *, workers: Optional[int]=None, options: dict=None) -> list[Optional[str]]:
+    # Renders consecutive pieces of one document; None for pieces that don't parse
+    items = [(chunk, not i) for i, chunk in enumerate(chunks)]
+    return _map(_parse_chunk, items, registry, settings, options, workers=workers, chunksize=1)
+
+
+def _map(function: Callable, items: Iterable, registry: nodes.Nodes, settings: dict, options: Optional[dict], *, workers: Optional[int], chunksize: Optional[int]) -> list:
+    items = list(items)
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(items) // (workers * 4))
+    initargs = (describe_nodes(registry), settings, options or {})
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as executor:
+        return list(executor.map(function, items, chunksize=chunksize))
@@ -0,0 +1,223 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Optional
+from .nodes import Registry
+
+Key = tuple  # (string, depth, kwargs)
+
+class RenderCache:
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size  # In bytes
+        self.entries: OrderedDict[Key, tuple[str, int]] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.registry: Optional[Registry] = None
+        self.version = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'size': self.size,
+        }
+
+    def check(self, registry: Registry) -> None:
+        # Outputs depend on the registered nodes, so drop them all if those change
+        if registry is not self.registry or registry.version != self.version:
+            self.clear()
+            self.registry = registry
+            self.version = registry.version
+
+    def get(self, key: Key) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Key, output: str) -> None:
+        size = sum(map(sys.getsizeof, key)) + sys.getsizeof(output)
+        if size > self.max_size:
+            return
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = output, size
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+
+DISK_CACHE_SIZE = 1 << 30
+
+class DiskCache:
+    # A content-addressed cache in an SQLite database, which any number of
+    # processes and threads can share. Entries are keyed by a hash of the key
+    # and a fingerprint of the registered nodes, so entries from other
+    # registries are simply never hit, and are evicted least recently used
+    # first once the database holds more than max_size bytes of output.
+    refresh = 60  # Seconds before a hit marks an entry as used again
+
+    def __init__(self, path: str, max_size: int=DISK_CACHE_SIZE, *, namespace: str='') -> None:
+        self.path = path
+        self.max_size = max_size
+        self.namespace = namespace  # Only caches with the same namespace share entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.registry: Optional[Registry] = None
+        self.version = 0
+        self.fingerprint = ''
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, output TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)')
+            db.execute('CREATE INDEX IF NOT EXISTS entries_used ON entries (used)')
+            db.execute('CREATE TABLE IF NOT EXISTS total (size INTEGER NOT NULL)')
+            db.execute('INSERT INTO total SELECT 0 WHERE NOT EXISTS (SELECT * FROM total)')
+
+    @property
+    def stats(self) -> dict[str, int]:
+        entries, size = self._db().execute('SELECT count(*), (SELECT size FROM total) FROM entries').fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': entries,
+            'size': size,
+        }
+
+    def check(self, registry: Registry) -> None:
+        if registry is not self.registry or registry.version != self.version:
+            self.fingerprint = fingerprint(registry)
+            self.registry = registry
+            self.version = registry.version
+
+    def get(self, key: Key) -> Optional[str]:
+        digest = self._digest(key)
+        db = self._db()
+        row = db.execute('SELECT output, used FROM entries WHERE key = ?', (digest,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        output, used = row
+        now = time.time()
+        if now - used > self.refresh:
+            db.execute('UPDATE entries SET used = ? WHERE key = ?', (now, digest))
+        self.hits += 1
+        return output
+
+    def put(self, key: Key, output: str) -> None:
+        digest = self._digest(key)
+        size = len(digest) + len(output.encode())
+        if size > self.max_size:
+            return
+        with self._connect() as db:
+            row = db.execute('SELECT size FROM entries WHERE key = ?', (digest,)).fetchone()
+            db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)', (digest, output, size, time.time()))
+            db.execute('UPDATE total SET size = size + ?', (size - (row[0] if row else 0),))
+            total, = db.execute('SELECT size FROM total').fetchone()
+            while total > self.max_size:
+                oldest = db.execute('SELECT key, size FROM entries ORDER BY used LIMIT 100').fetchall()
+                if not oldest:  # Nothing left, so the total had drifted
+                    total = 0
+                for old, old_size in oldest:
+                    db.execute('DELETE FROM entries WHERE key = ?', (old,))
+                    self.evictions += 1
+                    total -= old_size
+                    if total <= self.max_size:
+                        break
+                db.execute('UPDATE total SET size = ?', (total,))
+
+    def clear(self) -> None:
+        with self._connect() as db:
+            db.execute('DELETE FROM entries')
+            db.execute('UPDATE total SET size = 0')
+
+    def _digest(self, key: Key) -> bytes:
+        return hashlib.sha256(repr((self.namespace, self.fingerprint, key)).encode()).digest()
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per thread, and none inherited from a parent process
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            local.db.execute('PRAGMA journal_mode = WAL')
+            local.db.execute('PRAGMA synchronous = NORMAL')
+            local.pid = os.getpid()
+        return local.db
+
+    def _connect(self) -> '_Transaction':
+        return _Transaction(self._db())
+
+
+class _Transaction:
+    # Takes the write lock up front, so concurrent writers wait for each other
+    # rather than failing to upgrade a read lock
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self.db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, type, value, traceback) -> None:
+        self.db.execute('COMMIT' if type is None else 'ROLLBACK')
+
+
+_fingerprint = (None, 0, '')  # (registry, version, fingerprint) last worked out
+
+def fingerprint(registry: Registry) -> str:
+    # Hash of the registered commands and node classes, and of the source of
+    # the modules those classes are defined in and of this package, so outputs
+    # cached by another process or an earlier build are only reused while the
+    # same code would render them
+    global _fingerprint
+    ref, version, value = _fingerprint
+    if ref is not None and ref() is registry and version == registry.version:
+        return value
+    package = os.path.dirname(os.path.abspath(__file__))
+    paths = {
+        os.path.join(root, name)
+        for root, _, names in os.walk(package)
+        for name in names if name.endswith('.py')
+    }
+    digest = hashlib.sha256()
+    for command, node in sorted(registry.commands.items()):
+        digest.update(f'{command}={node.__module__}.{node.__qualname__}\n'.encode())
+        for cls in node.__mro__[:-1]:  # Not object
+            path = getattr(sys.modules.get(cls.__module__), '__file__', None)
+            if path is not None:
+                paths.add(os.path.abspath(path))
+    for path in sorted(paths):
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    value = digest.hexdigest()
+    _fingerprint = weakref.ref(registry), registry.version, value
+    return value
+
+
+def make_key(string: str, depth: int, kwargs: dict) -> Optional[Key]:
+    key = (string, depth, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
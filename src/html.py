@@ -1,3 +1,4 @@
+from contextvars import ContextVar
 from typing import Optional, Union
 
 Attribute = Union[str, bool, list[str], None]
@@ -53,17 +54,121 @@ BLOCK = {
     'ul',
 }
 
+# Set while rendering in compact mode, where block contents are laid out
+# inline rather than on indented lines
+COMPACT: ContextVar[bool] = ContextVar('COMPACT', default=False)
+
 def html(tag: str, attributes: Attributes, content: list[str]) -> str:
-    open = f'{tag} {format_attributes(attributes)}'.strip()
-    close = tag
+    builder = HtmlBuilder()
+    builder.open(tag, attributes)
+    for item in content:
+        builder.text(item)
+    builder.close()
+    return builder.getvalue()
+
+
+# How an open element lays out its content
+_VOID, _BLOCK, _INLINE_BLOCK, _INLINE = range(4)
+
+class HtmlBuilder:
+    # Writes html into one buffer from open/attr/text/close events, laid out
+    # as html() would: each text or nested element is one content item, and
+    # block contents go on their own indented lines (or inline without blank
+    # items in compact mode). Start tags are finished when something is
+    # written after them, so attributes can be added until then.
+    def __init__(self, *, compact: Optional[bool]=None) -> None:
+        self.compact = COMPACT.get() if compact is None else compact
+        self.buffer: list[str] = []
+        self.stack: list[list] = []  # [tag, layout, start tag finished, items written]
+        self.depth = 0  # Open indented blocks
+
+    def open(self, tag: str, attributes: Attributes=None) -> None:
+        if tag in VOID:
+            layout = _VOID
+        elif tag in BLOCK:
+            layout = _INLINE_BLOCK if self.compact else _BLOCK
+        else:
+            layout = _INLINE
+        if self._item(False):
+            self.buffer.append(f'<{tag}')
+        else:  # Inside a void element, so not written
+            layout = None
+        self.stack.append([tag, layout, False, 0])
+        if layout == _BLOCK:
+            self.depth += 1
+        for name, value in (attributes or {}).items():
+            self.attr(name, value)
+
+    def attr(self, name: str, value: Attribute) -> None:
+        frame = self.stack[-1]
+        if frame[2]:
+            raise ValueError(f'start tag of {frame[0]} already written')
+        if frame[1] is None or not value:
+            return
+        elif value is True:
+            self.buffer.append(f' {name}')
+        elif isinstance(value, str):
+            self.buffer.append(f' {name}="{value}"')
+        elif isinstance(value, list):
+            self.buffer.append(f' {name}="{" ".join(filter(None, value))}"')
+
+    def text(self, text: str) -> None:
+        if self._item(not text):
+            if self.depth and '\n' in text:
+                text = text.replace('\n', '\n' + '    '*self.depth)
+            self.buffer.append(text)
+
+    def close(self) -> None:
+        self._start()
+        tag, layout, _, items = self.stack.pop()
+        if layout == _BLOCK:
+            if not items:  # As if it had one empty item
+                self.buffer.append('\n' + '    '*self.depth)
+            self.depth -= 1
+            self.buffer.append(f'\n{"    "*self.depth}</{tag}>')
+        elif layout == _INLINE or layout == _INLINE_BLOCK:
+            self.buffer.append(f'</{tag}>')
+
+    def getvalue(self) -> str:
+        return ''.join(self.buffer)
+
+    def drain(self) -> str:
+        # Returns what's been written since the last drain
+        self._start()
+        value = ''.join(self.buffer)
+        self.buffer.clear()
+        return value
+
+    def _start(self) -> None:
+        if self.stack and not self.stack[-1][2]:
+            frame = self.stack[-1]
+            frame[2] = True
+            if frame[1] == _VOID:
+                self.buffer.append(' />')
+            elif frame[1] is not None:
+                self.buffer.append('>')
 
-    if tag in VOID:  # Self-closing
-        return f'<{open} />'
-    elif tag in BLOCK:  # Indented contents
-        body = '\n'.join(content)
-        return f'<{open}>\n{indent(body, 1)}\n</{close}>'
-    else:
-        return f'<{open}>{" ".join(content)}</{close}>'
+    def _item(self, empty: bool) -> bool:
+        # Writes whatever goes before the next content item, and returns
+        # whether the item is to be written at all
+        if not self.stack:
+            return True
+        self._start()
+        frame = self.stack[-1]
+        layout = frame[1]
+        if layout is None or layout == _VOID:
+            return False
+        elif layout == _BLOCK:
+            self.buffer.append('\n' + '    '*self.depth)
+        elif layout == _INLINE_BLOCK:
+            if empty:
+                return False
+            elif frame[3]:
+                self.buffer.append(' ')
+        elif frame[3]:
+            self.buffer.append(' ')
+        frame[3] += 1
+        return True
 
 
 def format_attributes(attributes: Attributes) -> str:
@@ -81,5 +186,5 @@ def format_attributes(attributes: Attributes) -> str:
 
 
 def indent(text: str, depth: int=0) -> str:
-    import re
-    return re.sub(r'^', '    '*depth, text, flags=re.M)
+    prefix = '    '*depth
+    return prefix + text.replace('\n', '\n' + prefix)
@@ -0,0 +1,47 @@
+from bisect import bisect_left
+from typing import Optional
+from .html import Attributes
+from .tree import Child, error, render
+
+# A top-level node or run of text: (start, end, child, rendered fragment)
+Segment = tuple[int, int, Child, str]
+
+class ParseState:
+    def __init__(self, source: str, depth: int, kwargs: Attributes, segments: Optional[list[Segment]], error_msg: str='', *, compact: bool=False) -> None:
+        self.source = source
+        self.depth = 0 if compact else depth
+        self.compact = compact
+        self.kwargs = kwargs
+        self.segments = segments  # None if the document failed to parse
+        self.error_msg = error_msg
+
+    @property
+    def fragments(self) -> list[str]:
+        return [fragment for *_, fragment in self.segments or []]
+
+    @property
+    def output(self) -> str:
+        if self.segments is None:
+            return error(self.error_msg)
+        return '    '*self.depth + ''.join(self.fragments)
+
+
+def make_segment(start: int, end: int, child: Child, depth: int, compact: bool=False) -> Segment:
+    # Equivalent to rendering the whole document, since indentation is only
+    # added after newlines apart from at the very start
+    fragment = render([child], depth=depth, compact=compact).removeprefix('    '*depth)
+    return start, end, child, fragment
+
+
+def touched(segments: list[Segment], offset: int, deleted: int) -> tuple[int, int]:
+    # Segments whose parse looked at any character in [offset, offset+deleted],
+    # including the character just after their end
+    first = bisect_left([end for _, end, *_ in segments], offset)
+    last = first
+    while last < len(segments) and segments[last][0] <= offset + deleted:
+        last += 1
+    return first, last
+
+
+def shift(segments: list[Segment], delta: int) -> list[Segment]:
+    return [(start + delta, end + delta, child, fragment) for start, end, child, fragment in segments]
@@ -1,17 +1,20 @@
 import re
+from functools import lru_cache
 from typing import Union
 from .base import MarkupError, InvalidData, Node
+from .registry import Registry
 from .table import TableNode
 from ..html import Attributes, html
-from ..utils import partition
+from ..utils import ipartition, partition
 
 
 class DescribeNode(Node):
     tag = 'dl'
+    opaque_text = True
 
     def make_content(self, text: list[str]) -> list[str]:
         content = []
-        for row in partition(text, '/'):
+        for row in ipartition(text, '/'):
             cells = partition(row, '|')
             term = cells.pop(0)
             if term:
@@ -24,6 +27,7 @@ class DescribeNode(Node):
 class LinkNode(Node):
     tag = 'a'
     params = {'_blank?': False, 'url': None}
+    opaque_text = True
 
     def make_attributes(self) -> Attributes:
         return self.attributes | {
@@ -37,6 +41,7 @@ class LinkNode(Node):
 
 class SectionNode(Node):
     tag = 'section'
+    opaque_text = True
 
     @staticmethod
     def parse_data(data: Attributes, kwargs: Attributes) -> tuple[Attributes, Attributes]:
@@ -59,6 +64,7 @@ class ListNode(Node):
         return 'ol' if any(self.data.values()) else 'ul'
 
     params = {'start=': '', 'reversed?': False}
+    opaque_text = True
 
     def make_attributes(self) -> Attributes:
         return self.attributes | self.data
@@ -66,13 +72,14 @@ class ListNode(Node):
     def make_content(self, text: list[str]) -> list[str]:
         # Don't make list items if text is empty
         if text:
-            text = [html('li', {}, part) for part in partition(text, '/')]
+            text = [html('li', {}, part) for part in ipartition(text, '/')]
         return text
 
 
 SIMPLE_NODES = [
     'br', 'blockquote', 'div', 'em', 'hr', 'i', 'p', 'sup', 'sub', 'strong',
 ]
+@lru_cache  # So every registry shares the same classes
 def _make_simple_node(node: str) -> Node:
     return type(f'{node.capitalize()}Node', (Node,), {'tag': node})
 
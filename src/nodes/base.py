@@ -1,4 +1,5 @@
-from ..html import Attributes, html
+from typing import Iterator
+from ..html import Attributes, HtmlBuilder
 
 class MarkupError(Exception):
     prefix = ''
@@ -18,6 +19,27 @@ class InvalidData(MarkupError):
 class Node:
     tag: str
     params: Attributes = {}
+    spec: 'ParamSpec'
+    # Whether the node's html is its text unchanged in its tag, so it can be
+    # written out piece by piece without the node seeing its text.
+    streamable = True
+    # Whether the node's html only moves its text items around (splitting on
+    # separator items and wrapping them in tags) without reading or changing
+    # them, so nested elements can be written in after it's rendered.
+    opaque_text = False
+    # Neither is inherited by subclasses that override how the node uses its
+    # text, unless they say so again.
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if any(name in vars(cls) for name in _TEXT_METHODS) or isinstance(vars(cls).get('tag'), property):
+            for flag in ('streamable', 'opaque_text'):
+                if flag not in vars(cls):
+                    setattr(cls, flag, False)
+        try:
+            cls.spec = ParamSpec(cls.params)
+        except ValueError as e:
+            raise TypeError(f'invalid params for {cls.__name__}: {e}') from None
 
     def __init__(self, id: str='', classes: list[str]=None, data: Attributes=None, text: list[str]=None) -> None:
         self.attributes = {'id': id, 'class': classes or []}
@@ -25,15 +47,30 @@ class Node:
         self.text = text or []
 
     def __str__(self) -> str:
-        return html(self.tag, self.make_attributes(), self.make_content(self.text))
+        return self.render(self.text)
+
+    def render(self, text: list[str]) -> str:
+        builder = HtmlBuilder()
+        self.build(builder, text)
+        return builder.getvalue()
+
+    def build(self, builder: HtmlBuilder, text: list[str]) -> None:
+        builder.open(self.tag, self.make_attributes())
+        for item in self.make_content(text):
+            builder.text(item)
+        builder.close()
+
+    def iter_render(self, text: list[str]) -> Iterator[str]:
+        # Nodes that can write their html a piece at a time override this
+        yield self.render(text)
 
     @classmethod
     def default_data(cls) -> Attributes:
-        return {param.removesuffix('=').removesuffix('?'): value for param, value in cls.params.items()}
+        return dict(cls.spec.defaults)
 
     @classmethod
     def _parse_data(cls, raw_data: list[str], *, kwargs: Attributes=None) -> tuple[Attributes, Attributes]:
-        return cls.parse_data(parse_data(raw_data, cls.params), kwargs or {})
+        return cls.parse_data(cls.spec.bind(raw_data), kwargs or {})
 
     @staticmethod
     def parse_data(data: Attributes, kwargs: Attributes) -> tuple[Attributes, Attributes]:
@@ -49,37 +86,69 @@ class Node:
         return text
 
 
-def parse_data(data: list[str], params: Attributes) -> Attributes:
-    positionals = {param: default for param, default in reversed(params.items()) if not param.endswith('?') and not param.endswith('=')}
-    boolean = {param.removesuffix('?'): default for param, default in params.items() if param.endswith('?')}
-    named = {param.removesuffix('='): default for param, default in params.items() if param.endswith('=')}
-    data_dict = {}
-    for arg in data:
-        # Test for named argument
-        if '=' in arg:
-            name, value = arg.split('=', maxsplit=1)
-            if name in named or '*' in named:
-                named.pop(name, None)
-                data_dict[name] = value
+_TEXT_METHODS = ('__init__', '__str__', 'render', 'build', 'iter_render', 'make_attributes', 'make_content')
+
+class ParamSpec:
+    # A node's params, sorted once into the kinds of argument they match:
+    # `name` positional, `name?` boolean flag and `name=` named, where a `*=`
+    # param accepts any named argument
+    def __init__(self, params: Attributes) -> None:
+        names = set()
+        for param in params:
+            name = param.removesuffix('=').removesuffix('?')
+            if not name or '=' in name or name.endswith('?') or any(char.isspace() for char in name):
+                raise ValueError(f'bad param {param!r}')
+            elif '*' in name and param != '*=':
+                raise ValueError(f'only named params can be {"*"!r}, not {param!r}')
+            elif name in names:
+                raise ValueError(f'duplicate param {name!r}')
+            names.add(name)
+        # Reversed, so that the next positional to fill comes off the end
+        self.positionals = {param: default for param, default in reversed(params.items()) if not param.endswith('?') and not param.endswith('=')}
+        self.boolean = {param.removesuffix('?'): default for param, default in params.items() if param.endswith('?')}
+        self.named = {param.removesuffix('='): default for param, default in params.items() if param.endswith('=')}
+        self.defaults = {param.removesuffix('=').removesuffix('?'): value for param, value in params.items()}
+
+    def bind(self, data: list[str]) -> Attributes:
+        if not data and not self.positionals and not self.boolean and not self.named:
+            return {}
+        positionals = self.positionals.copy()
+        boolean = self.boolean.copy()
+        named = self.named.copy()
+        data_dict = {}
+        for arg in data:
+            # Test for named argument
+            if '=' in arg:
+                name, value = arg.split('=', maxsplit=1)
+                if name in named or '*' in named:
+                    named.pop(name, None)
+                    data_dict[name] = value
+                else:
+                    raise InvalidData(f'unknown named argument {name!r}')
+            # Test for boolean argument
+            elif arg in boolean:
+                boolean.pop(arg)
+                data_dict[arg] = True
+            # Must be positional
+            elif positionals:
+                name, _ = positionals.popitem()
+                data_dict[name] = arg
             else:
-                raise InvalidData(f'unknown named argument {name!r}')
-        # Test for boolean argument
-        elif arg in boolean:
-            boolean.pop(arg)
-            data_dict[arg] = True
-        # Must be positional
-        elif positionals:
-            name, _ = positionals.popitem()
-            data_dict[name] = arg
-        else:
-            raise InvalidData(f'additional positional argument {arg!r}')
-    named.pop('*', None)
-    missing = []
-    for name, default in (positionals | boolean | named).items():
-        if default is None:
-            missing.append(name)
-        else:
-            data_dict[name] = default
-    if missing:
-        raise InvalidData(f'missing required arguments {"".join(list(map(repr, missing)))}')
-    return data_dict
+                raise InvalidData(f'additional positional argument {arg!r}')
+        named.pop('*', None)
+        missing = []
+        for name, default in (positionals | boolean | named).items():
+            if default is None:
+                missing.append(name)
+            else:
+                data_dict[name] = default
+        if missing:
+            raise InvalidData(f'missing required arguments {"".join(list(map(repr, missing)))}')
+        return data_dict
+
+
+def parse_data(data: list[str], params: Attributes) -> Attributes:
+    return ParamSpec(params).bind(data)
+
+
+Node.spec = ParamSpec(Node.params)
@@ -0,0 +1,72 @@
+from collections.abc import Iterator, Mapping, MutableMapping
+from typing import Optional
+from .base import Node
+
+class Commands(MutableMapping):
+    # The nodes registered under one prefix; changes are passed on to the registry
+    def __init__(self, registry: 'Registry', nodes: Mapping[str, type[Node]]) -> None:
+        self._registry = registry
+        self._nodes = dict(nodes)
+
+    def __getitem__(self, command: str) -> type[Node]:
+        return self._nodes[command]
+
+    def __setitem__(self, command: str, node: type[Node]) -> None:
+        self._nodes[command] = node
+        self._registry._compile()
+
+    def __delitem__(self, command: str) -> None:
+        del self._nodes[command]
+        self._registry._compile()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __repr__(self) -> str:
+        return repr(self._nodes)
+
+
+class Registry(MutableMapping):
+    # Maps prefix -> command -> node class like a dict of dicts, and keeps the
+    # string of prefixes and a flat command table for the parser up to date.
+    # `version` goes up on every change. The mapping it's made from is copied,
+    # so only changes made through the registry are seen.
+    def __init__(self, nodes: Optional[Mapping[str, Mapping[str, type[Node]]]]=None) -> None:
+        self._tables = {prefix: Commands(self, table) for prefix, table in (nodes or {}).items()}
+        self.version = 0
+        self._compile()
+
+    def _compile(self) -> None:
+        self.prefixes = ''.join(self._tables)
+        self.commands = {
+            prefix + command: node
+            for prefix, table in self._tables.items()
+            for command, node in table.items()
+        }
+        self.version += 1
+
+    def lookup(self, prefix: str, command: str) -> Optional[type[Node]]:
+        return self.commands.get(prefix + command)
+
+    def __getitem__(self, prefix: str) -> Commands:
+        return self._tables[prefix]
+
+    def __setitem__(self, prefix: str, nodes: Mapping[str, type[Node]]) -> None:
+        self._tables[prefix] = Commands(self, nodes)
+        self._compile()
+
+    def __delitem__(self, prefix: str) -> None:
+        del self._tables[prefix]
+        self._compile()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tables)
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def __repr__(self) -> str:
+        return f'Registry({self._tables!r})'
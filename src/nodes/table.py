@@ -1,10 +1,12 @@
-from functools import reduce
+from collections import deque
+from typing import Iterable, Iterator, Optional
 from .base import MarkupError, InvalidData, Node
-from ..html import Attributes, html
-from ..utils import partition
+from ..html import Attributes, HtmlBuilder
+from ..utils import ipartition, partition
 
 class TableNode(Node):
     tag = 'table'
+    opaque_text = True
     params = {'headers=': ''}
 
     def make_data(self, data: Attributes) -> Attributes:
@@ -14,22 +16,108 @@ class TableNode(Node):
         return data
 
     def make_content(self, text: list[str]) -> list[str]:
-        rows = []
-
-        if '//' in text:
-            caption, text = partition(text, '//')
-            rows.append(html('caption', {}, caption))
-
-        table = [partition(row, '|') for row in partition(text, '/')]
-        if len(set(map(len, table))) != 1:
-            raise MarkupError('Table rows must be the same size')
-        for num, row in enumerate(_merge_table(table)):
-            rows.extend(_make_tr(row, headers=set(self.data['headers']), row_num=num))
-        return rows
-
-
-def _merge_table(table: list[list[list[str]]]) -> list[list[dict]]:
-    return reduce(_merge_up, map(lambda row: reduce(_merge_left, row, []), table), [])
+        # The html of the caption and each row, on their own
+        builder = HtmlBuilder()
+        content = []
+        for _ in self._write_rows(builder, *_split_caption(text)):
+            row = builder.drain()
+            if row:
+                content.append(row)
+        return content
+
+    def build(self, builder: HtmlBuilder, text: list[str]) -> None:
+        # Rows are written straight to the builder, unless a subclass changes
+        # the content
+        if type(self).make_content is not TableNode.make_content:
+            return super().build(builder, text)
+        caption, text = _split_caption(text)
+        builder.open(self.tag, self.make_attributes())
+        for _ in self._write_rows(builder, caption, text):
+            pass
+        builder.close()
+
+    def iter_render(self, text: list[str]) -> Iterator[str]:
+        # The merges are checked first, so that errors are raised before any
+        # of the table is written; rows are then written as they're finished
+        if type(self).make_content is not TableNode.make_content:
+            return super().iter_render(text)
+        caption, text = _split_caption(text)
+        for _ in _merge_rows(_split_rows(text)):
+            pass
+        builder = HtmlBuilder()
+        builder.open(self.tag, self.make_attributes())
+        return _drain(builder, self._write_rows(builder, caption, text))
+
+    def _write_rows(self, builder: HtmlBuilder, caption: Optional[list[str]], text: list[str]) -> Iterator[None]:
+        # Pauses after the caption and each row
+        if caption is not None:
+            builder.open('caption')
+            for item in caption:
+                builder.text(item)
+            builder.close()
+            yield
+        headers = set(self.data['headers'])
+        for num, row in enumerate(_merge_rows(_split_rows(text))):
+            _write_tr(builder, row, headers=headers, row_num=num)
+            yield
+
+
+def _drain(builder: HtmlBuilder, steps: Iterator[None]) -> Iterator[str]:
+    yield builder.drain()
+    for _ in steps:
+        yield builder.drain()
+    builder.close()
+    yield builder.drain()
+
+
+def _split_caption(text: list[str]) -> tuple[Optional[list[str]], list[str]]:
+    # Row sizes are checked up front, as counting is cheap next to merging
+    caption = None
+    if '//' in text:
+        caption, text = partition(text, '//')
+    if len({row.count('|') for row in ipartition(text, '/')}) != 1:
+        raise MarkupError('Table rows must be the same size')
+    return caption, text
+
+
+def _split_rows(text: list[str]) -> Iterator[list[list[str]]]:
+    return (partition(row, '|') for row in ipartition(text, '/'))
+
+
+def _merge_rows(table: Iterable[list[list[str]]]) -> Iterator[list[dict]]:
+    # Resolves merges one row at a time. `above` holds, for each column, the
+    # cell a ^ starting in that column merges into, and the number of the row
+    # it's from: the cell starting there in the row above, or the cell that
+    # one merged into if it's a ^ itself. A column no cell in the row above
+    # starts in has None. Rows are yielded once no cell in them is in `above`,
+    # since nothing can add to their rowspans after that.
+    pending = deque()
+    above = None
+    for num, cells in enumerate(table):
+        row = []
+        for cell in cells:
+            _merge_left(row, cell)
+        below = [None] * len(cells)
+        col = 0
+        for cell in row:
+            if cell['data'] == ['^']:
+                if above is None:
+                    raise MarkupError('Invalid cell merge')
+                target = above[col] if col < len(above) else None
+                if target is None or target[0]['cols'] != cell['cols']:
+                    raise MarkupError('Misaligned table cell')
+                target[0]['rows'] += 1
+                below[col] = target
+            else:
+                below[col] = cell, num
+            col += cell['cols']
+        pending.append((num, row))
+        above = below
+        oldest = min((origin for _, origin in filter(None, above)), default=num+1)
+        while pending and pending[0][0] < oldest:
+            yield pending.popleft()[1]
+    for _, row in pending:
+        yield row
 
 
 def _merge_left(row: list[dict], cell: list[str]) -> list[dict]:
@@ -47,51 +135,23 @@ def _merge_left(row: list[dict], cell: list[str]) -> list[dict]:
     return row
 
 
-def _merge_up(table: list[list[dict]], row: list[dict]) -> list[list[dict]]:
-    col = 0
-    for cell in row:
-        if cell['data'] == ['^']:
-            if not table:
-                raise MarkupError('Invalid cell merge')
-            for trow in reversed(table):
-                tcol = 0
-                for tcell in trow:
-                    if tcol == col:
-                        break
-                    elif tcol > col:
-                        raise MarkupError('Misaligned table cell')
-                    else:
-                        tcol += tcell['cols']
-                if tcell['data'] != ['^']:
-                    if tcell['cols'] == cell['cols']:
-                        tcell['rows'] += 1
-                        break
-                    else:
-                        raise MarkupError('Misaligned table cell')
-        col += cell['cols']
-
-    table.append(row)
-    return table
-
-
-def _make_tr(row: list[dict], *, headers: set[str], row_num: int) -> list[str]:
-    cells = []
+def _write_tr(builder: HtmlBuilder, row: list[dict], *, headers: set[str], row_num: int) -> None:
+    # Rows of nothing but carets aren't written
+    if all(cell['data'] == ['^'] for cell in row):
+        return
+    builder.open('tr')
     for num, cell in enumerate(row):
-        cells.extend(_make_td(cell, headers=headers, row_num=row_num, col_num=num))
-    if cells:
-        return [html('tr', {}, cells)]
-    else:
-        return []
+        _write_td(builder, cell, headers=headers, row_num=row_num, col_num=num)
+    builder.close()
 
 
-def _make_td(cell: dict, *, headers: set[str], row_num: int, col_num: int) -> list[str]:
+def _write_td(builder: HtmlBuilder, cell: dict, *, headers: set[str], row_num: int, col_num: int) -> None:
     if cell['data'] != ['^']:
-        tag = 'th' if ('cols' in headers and not row_num or 'rows' in headers and not col_num) else 'td'
-        attributes = {}
+        builder.open('th' if ('cols' in headers and not row_num or 'rows' in headers and not col_num) else 'td')
         if cell['rows'] != 1:
-            attributes['rowspan'] = str(cell['rows'])
+            builder.attr('rowspan', str(cell['rows']))
         if cell['cols'] != 1:
-            attributes['colspan'] = str(cell['cols'])
-        return [html(tag, attributes, cell['data'])]
-    else:
-        return []
+            builder.attr('colspan', str(cell['cols']))
+        for item in cell['data']:
+            builder.text(item)
+        builder.close()
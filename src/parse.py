@@ -1,7 +1,16 @@
+import re
 import string
-from typing import Optional
-from . import nodes
-from .html import Attributes, indent
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, TextIO, Union
+from . import batch, nodes, serialize
+from .cache import DISK_CACHE_SIZE, DiskCache, RenderCache, make_key
+from .html import Attributes
+from .incremental import ParseState, Segment, make_segment, shift, touched
+from .nodes import Node, Nodes, Registry
+from .profiling import Profiler
+from .template import Template, compile_template
+from .tree import NEWLINE, Document, Element, Error, Child, Part, Text, Variable, error, is_streamable, iter_render, render, render_child, render_part, unescape
 
 class ParseError(Exception):
     def __init__(self, message: str, remainder: str) -> str:
@@ -12,115 +21,465 @@ class ParseError(Exception):
 
 STRING_CHARS = string.ascii_letters + string.digits + '_-'
 
-def error(msg: str) -> str:
-    return f'<span class="error">&lt;{msg}&gt;</span>'
-
-
 def is_valid_char(char: str, alphabet: str, exclude: str) -> bool:
     return (not alphabet or char in alphabet) and char not in exclude
 
 
-def unescape(string: str) -> str:
-    import re
-    escapes = {
-        'n': '\n',
-    }
-    return re.sub(r'\\(.)', lambda m: escapes.get(m[1], m[1]), string, flags=re.S)
+@lru_cache
+def text_run(alphabet: str, exclude: str, prefixes: str, escapes: bool=False) -> re.Pattern:
+    # Matches a run of valid characters that need no special handling, and
+    # with `escapes`, the escapes among them other than \n
+    special = exclude + prefixes + '\\'
+    if escapes and not alphabet and '\\' not in exclude:
+        return re.compile(f'(?:[^{re.escape(special)}]+|\\\\[^n])+')
+    elif alphabet:
+        chars = ''.join(sorted(set(alphabet) - set(special)))
+        if not chars:
+            return re.compile(r'(?!)')
+        return re.compile(f'[{re.escape(chars)}]+')
+    else:
+        return re.compile(f'[^{re.escape(special)}]+')
+
+
+def resolve_escapes(text: str) -> str:
+    # Every backslash in a run from text_run(escapes=True) starts an escape
+    # with no \n among them, so they can be resolved with plain replaces
+    if '\\' not in text:
+        return text
+    elif '\\\\' not in text:
+        return text.replace('\\', '')
+    elif '\0' in text:
+        return unescape(text)
+    return text.replace('\\\\', '\0').replace('\\', '').replace('\0', '\\')
+
+
+def split_top_level(source: str, prefixes: str, size: int) -> list[int]:
+    # Cheap scan for offsets of top-level nodes, taking escapes, quotes and
+    # brackets into account, returning ones about `size` apart along with the
+    # start and end of the source. Offsets are only a guess, to be checked by
+    # parsing the pieces between them.
+    bounds = [0]
+    if prefixes:
+        specials = re.compile(f'[\\\\"{{}}\\[\\]{re.escape(prefixes)}]')
+        depth = 0
+        quoted = False
+        pos = 0
+        while True:
+            match = specials.search(source, pos)
+            if match is None:
+                break
+            pos = match.end()
+            char = match[0]
+            if char == '\\':
+                pos += 1
+            elif depth and char == '"':
+                quoted = not quoted
+            elif quoted:
+                continue
+            elif char in '{[':
+                depth += 1
+            elif char in '}]':
+                depth = max(depth - 1, 0)
+            elif not depth and match.start() - bounds[-1] >= max(size, 1):
+                bounds.append(match.start())
+    if bounds[-1] != len(source) or len(bounds) == 1:
+        bounds.append(len(source))
+    return bounds
 
 
 class Markup:
-    def __init__(self) -> None:
+    def __init__(self, *, cache_size: int=0, cache_path: Optional[str]=None, max_depth: Optional[int]=None, compact: bool=False, profiler: Optional[Profiler]=None) -> None:
         self.nodes = nodes.make_nodes()
+        self.max_depth = max_depth
+        self.compact = compact
+        if cache_path is not None:
+            # Shared with other processes, which may have other settings
+            self.cache = DiskCache(cache_path, cache_size or DISK_CACHE_SIZE, namespace=f'max_depth={max_depth}')
+        else:
+            self.cache = RenderCache(cache_size) if cache_size else None
+        self.profiler = profiler  # Only sees documents parsed in this process
 
     @property
-    def prefixes(self) -> string:
-        return ''.join(self.nodes)
+    def nodes(self) -> Registry:
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, value: Nodes) -> None:
+        # Other mappings are copied, so later changes to them aren't seen;
+        # nodes are registered afterwards through markup.nodes
+        self._nodes = value if isinstance(value, Registry) else Registry(value)
+
+    @property
+    def prefixes(self) -> str:
+        return self._nodes.prefixes
 
     def parse(self, string: str, *, depth: int=0, **kwargs) -> str:
+        if self.cache is None:
+            return self._parse(string, depth=depth, kwargs=kwargs)
+        # Compact output doesn't depend on depth
+        key = make_key(string, None if self.compact else depth, kwargs)
+        if key is None:
+            return self._parse(string, depth=depth, kwargs=kwargs)
+        self.cache.check(self.nodes)
+        output = self.cache.get(key)
+        if output is None:
+            output = self._parse(string, depth=depth, kwargs=kwargs)
+            self.cache.put(key, output)
+        return output
+
+    def _parse(self, string: str, *, depth: int, kwargs: Attributes) -> str:
         try:
-            output, _ = self.parse_string(string, kwargs=kwargs)
-            return unescape(indent(output, depth=depth))
+            return render(self.parse_tree(string, **kwargs), depth=depth, compact=self.compact, profiler=self.profiler)
         except ParseError as e:
             return error(e.message)
 
-    def parse_string(self, value: str, *, alphabet: str='', exclude: str='', error_msg: str='', kwargs: Attributes=None) -> tuple[str, str]:
-        out = ''
-        while value and is_valid_char(value[0], alphabet, exclude):
-            if value[0] == '\\':
-                if len(value) <= 1:
-                    raise ParseError('Incomplete escape sequence', value)
-                else:
-                    out += value[:2]
-                    value = value[2:]
-            elif value[0] in self.prefixes:
-                node, value = self.parse_node(value, kwargs=kwargs)
-                out += node
-            else:
-                out += value[0]
-                value = value[1:]
-        if out or not error_msg:
-            return out, value
+    def parse_iter(self, string: str, *, depth: int=0, **kwargs) -> Iterator[str]:
+        try:
+            document = self.parse_tree(string, **kwargs)
+        except ParseError as e:
+            yield error(e.message)
         else:
-            raise ParseError(error_msg, value)
+            yield from iter_render(document, depth=depth, compact=self.compact, profiler=self.profiler)
+
+    def render_to(self, string: str, fp: TextIO, *, depth: int=0, **kwargs) -> None:
+        for chunk in self.parse_iter(string, depth=depth, **kwargs):
+            fp.write(chunk)
+
+    def parse_many(self, strings: Iterable[str], *, workers: Optional[int]=None, chunksize: Optional[int]=None, depth: int=0, **kwargs) -> list[Union[str, batch.BatchError]]:
+        # Results are in input order; documents that fail are returned as BatchErrors
+        options = {'depth': depth} | kwargs
+        return batch.parse_many(self.nodes, self._settings(), strings, workers=workers, chunksize=chunksize, options=options)
+
+    def _settings(self) -> dict:
+        # Constructor arguments for the Markup a worker process parses with
+        settings = {'max_depth': self.max_depth, 'compact': self.compact}
+        if isinstance(self.cache, DiskCache):  # Shared by the workers
+            settings |= {'cache_path': self.cache.path, 'cache_size': self.cache.max_size}
+        return settings
+
+    def parse_parallel(self, string: str, *, workers: Optional[int]=None, chunk_size: int=100_000, depth: int=0, **kwargs) -> str:
+        # Splits the document between top-level nodes and parses the pieces in
+        # worker processes. Top-level nodes share no parse state (kwargs such as
+        # section_level only pass into a node's own text field), so each piece
+        # can be parsed as a document of its own. The pieces skip the cache and
+        # the profiler, as they're parsed by other processes.
+        if self.compact:
+            depth = 0
+        bounds = split_top_level(string, self.prefixes, chunk_size)
+        if len(bounds) <= 2:  # One piece, not worth starting workers for
+            return self.parse(string, depth=depth, **kwargs)
+        chunks = [string[start:end] for start, end in zip(bounds, bounds[1:])]
+        settings = {'max_depth': self.max_depth, 'compact': self.compact}
+        options = {'depth': depth, 'kwargs': kwargs}
+        output = []
+        for start, fragment in zip(bounds, batch.parse_chunks(self.nodes, settings, chunks, workers=workers, options=options)):
+            if fragment is None:
+                # Either the scan misjudged a boundary or the rest of the document is
+                # malformed. Every earlier piece parsed, so `start` is a real boundary
+                # and parsing from there in one go settles which.
+                try:
+                    output.append(self._parse_chunk(string[start:], depth=depth, first=not output, kwargs=kwargs))
+                except ParseError as e:
+                    return error(e.message)
+                break
+            output.append(fragment)
+        return ''.join(output)
+
+    def _parse_chunk(self, string: str, *, depth: int, first: bool, kwargs: Attributes) -> str:
+        output = render(self.parse_tree(string, **kwargs), depth=depth, compact=self.compact)
+        return output if first else output.removeprefix('    '*depth)
+
+    def parse_tree(self, string: str, **kwargs) -> Document:
+        # Escapes in document text, and in the text of nodes that write theirs
+        # unchanged, are resolved as they're lexed
+        document, _ = self._parse_string(string, 0, kwargs=kwargs, resolve=True)
+        return document
+
+    def render_tree(self, document: Document, *, depth: int=0) -> str:
+        return render(document, depth=depth, compact=self.compact, profiler=self.profiler)
+
+    def dumps(self, string: str, **kwargs) -> bytes:
+        # The parsed tree, for loads to read back with these same nodes
+        return serialize.dumps(self.parse_tree(string, **kwargs), self._nodes)
+
+    def loads(self, data: bytes) -> Document:
+        return serialize.loads(data, self._nodes)
+
+    def compile(self, string: str, *, depth: int=0, marker: str='%', **kwargs) -> Template:
+        # Variables are written `marker` followed by their name, in text but
+        # not in data fields, and the template is rendered with their values
+        # as literal text. A marker not followed by a name is just text.
+        if len(marker) != 1 or marker.isspace() or marker in self.prefixes + STRING_CHARS + '\\{}[]"':
+            raise ValueError(f'invalid template marker: {marker!r}')
+        try:
+            document, _ = self._parse_string(string, 0, kwargs=kwargs, resolve=True, marker=marker)
+        except ParseError as e:
+            return Template([error(e.message)])
+        return compile_template(document, depth=depth, compact=self.compact)
+
+    def parse_state(self, string: str, *, depth: int=0, **kwargs) -> ParseState:
+        return self.reparse(ParseState('', depth, kwargs, [], compact=self.compact), 0, 0, string)
+
+    def reparse(self, state: ParseState, offset: int, deleted: int, inserted: str) -> ParseState:
+        # Re-parses only the top-level segments touched by replacing `deleted`
+        # characters at `offset` with `inserted`, and reuses the rest
+        source = state.source[:offset] + inserted + state.source[offset+deleted:]
+        if state.segments is None:
+            return self.reparse(ParseState('', state.depth, state.kwargs, [], compact=state.compact), 0, 0, source)
+        delta = len(inserted) - deleted
+        first, last = touched(state.segments, offset, deleted)
+        before, after = state.segments[:first], state.segments[last:]
+        starts = [start for start, *_ in after]
+        pos = state.segments[first][0] if first < len(state.segments) else 0
+        segments = []
+        try:
+            for segment in self._parse_segments(source, pos, depth=state.depth, compact=state.compact, kwargs=state.kwargs):
+                segments.append(segment)
+                end = segment[1]
+                if end >= offset + len(inserted):
+                    # Back in step with the old parse once a segment ends where one used to start
+                    i = bisect_left(starts, end - delta)
+                    if i < len(starts) and starts[i] == end - delta:
+                        segments.extend(shift(after[i:], delta))
+                        break
+        except ParseError as e:
+            return ParseState(source, state.depth, state.kwargs, None, e.message, compact=state.compact)
+        return ParseState(source, state.depth, state.kwargs, before + segments, compact=state.compact)
+
+    def parse_string(self, value: str, *, alphabet: str='', exclude: str='', error_msg: str='', kwargs: Attributes=None) -> tuple[str, str]:
+        part, pos = self._parse_string(value, 0, alphabet=alphabet, exclude=exclude, error_msg=error_msg, kwargs=kwargs)
+        return render_part(part), value[pos:]
 
     def parse_node(self, value: str, *, kwargs: Attributes=None) -> tuple[str, str]:
+        child, pos = self._parse_node(value, 0, kwargs=kwargs)
+        return render_child(child), value[pos:]
+
+    def parse_list(self, value: str, *, exclude: str='', end: str='', error_msg: str='', kwargs: Attributes=None) -> tuple[list[str], str]:
+        parts, pos = self._parse_list(value, 0, exclude=exclude, end=end, error_msg=error_msg, kwargs=kwargs)
+        return list(map(render_part, parts)), value[pos:]
+
+    # The parsers below walk an offset over a single source string rather than
+    # slicing off what they consume, and return the offset they stopped at.
+    # Nested nodes are handled by _run with an explicit stack of frames, so
+    # nesting depth isn't limited by the interpreter's recursion limit.
+    def _parse_string(self, source: str, pos: int, *, alphabet: str='', exclude: str='', error_msg: str='', kwargs: Attributes=None, resolve: bool=False, marker: str='') -> tuple[Part, int]:
+        return self._run(source, pos, _StringFrame(alphabet, exclude, error_msg, kwargs, resolve), marker)
+
+    def _parse_segments(self, source: str, pos: int, *, depth: int, compact: bool, kwargs: Attributes) -> Iterator[Segment]:
+        prefixes = self._nodes.prefixes
+        while pos < len(source):
+            start = pos
+            if source[pos] in prefixes:
+                child, pos = self._parse_node(source, pos, kwargs=kwargs)
+            else:
+                (child,), pos = self._parse_string(source, pos, exclude=prefixes)
+            yield make_segment(start, pos, child, depth, compact)
+
+    def _parse_node(self, source: str, pos: int, *, kwargs: Attributes=None) -> tuple[Child, int]:
+        child, pos, frame = self._parse_header(source, pos, kwargs=kwargs)
+        if frame is None:
+            return child, pos
+        return self._run(source, pos, frame)
+
+    def _parse_header(self, source: str, pos: int, *, kwargs: Attributes=None, resolve: bool=False) -> tuple[Optional[Child], int, Optional['_ListFrame']]:
         # $cmd#id.class.class[data]{text}
-        prefix, value = value[0], value[1:]
-        command, value = self.parse_string(value, alphabet=STRING_CHARS, error_msg='Invalid command name')
+        # Returns a frame for the text field if there is one, else the node
+        prefix = source[pos]
+        command, pos = self._parse_word(source, pos+1, error_msg='Invalid command name')
 
-        node = self.nodes.get(prefix, {}).get(command)
+        node = self._nodes.lookup(prefix, command)
         if node is None:
-            return error(f'Invalid node: {prefix}{command}'), value
+            return Error(f'Invalid node: {prefix}{command}'), pos, None
 
-        if value and value[0] == '#':
-            id, value = self.parse_string(value[1:], alphabet=STRING_CHARS, error_msg='Invalid id')
+        if source.startswith('#', pos):
+            id, pos = self._parse_word(source, pos+1, error_msg='Invalid id')
         else:
             id = ''
 
         classes = []
-        while value and value[0] == '.':
-            class_, value = self.parse_string(value[1:], alphabet=STRING_CHARS, error_msg='Invalid class')
+        while source.startswith('.', pos):
+            class_, pos = self._parse_word(source, pos+1, error_msg='Invalid class')
             classes.append(class_)
 
-        if value and value[0] == '[':
-            raw_data, value = self.parse_list(value[1:], exclude=self.prefixes, end=']', error_msg='Incomplete data field')
-            value = value[1:]
+        if source.startswith('[', pos):
+            raw_data, pos = self._parse_list(source, pos+1, exclude=self._nodes.prefixes, end=']', error_msg='Incomplete data field')
+            raw_data = list(map(render_part, raw_data))
+            pos += 1
         else:
             raw_data = []
         try:
-            data, kwargs = node._parse_data(raw_data, kwargs=kwargs)
+            if self.profiler is None:
+                data, kwargs = node._parse_data(raw_data, kwargs=kwargs)
+            else:
+                data, kwargs = self.profiler.call('data', node, node._parse_data, raw_data, kwargs=kwargs)
         except nodes.MarkupError as e:
-            return error(e.message), value
+            return Error(e.message), pos, None
 
-        if value and value[0] == '{':
-            text, value = self.parse_list(value[1:], end='}', error_msg='Incomplete text field', kwargs=kwargs)
-            value = value[1:]
+        if source.startswith('{', pos):
+            resolve = resolve and is_streamable(node)
+            return None, pos+1, _ListFrame('', '}', 'Incomplete text field', kwargs, (node, id, classes, data), resolve)
         else:
-            text = []
+            return self._make_element(node, id, classes, data, []), pos, None
 
-        try:
-            return str(node(id, classes, data, text)), value
-        except nodes.MarkupError as e:
-            return error(e.message), value
-        except Exception as e:
-            return error(f'{type(e).__name__}: {e}'), value
+    def _make_element(self, node: type[Node], id: str, classes: list[str], data: Attributes, text: list[Part]) -> Child:
+        if self.profiler is None:
+            return make_element(node, id, classes, data, text)
+        return self.profiler.call('build', node, make_element, node, id, classes, data, text)
 
-    def parse_list(self, value: str, *, exclude: str='', end: str='', error_msg: str='', kwargs: Attributes=None) -> tuple[list[str], str]:
-        parts = []
-        while value and value[0] not in end:
-            if value[0] in string.whitespace:
-                _, value = self.parse_string(value, alphabet=string.whitespace)
-                continue
-            elif value[0] == '"':
-                part, value = self.parse_string(value[1:], exclude=exclude + '"', kwargs=kwargs)
-                if not value:
-                    raise ParseError('Incomplete string', value)
-                elif value[0] != '"':
-                    raise ParseError('Invalid character', value)
-                value = value[1:]
-            else:
-                part, value = self.parse_string(value, exclude=exclude + end + '"' + string.whitespace, error_msg='Invalid character', kwargs=kwargs)
-            parts.append(part)
-        if end and not value:
-            raise ParseError(error_msg, value)
-        return parts, value
+    def _parse_word(self, source: str, pos: int, *, error_msg: str) -> tuple[str, int]:
+        match = text_run(STRING_CHARS, '', self._nodes.prefixes).match(source, pos)
+        end = match.end() if match else pos
+        if end < len(source) and source[end] in STRING_CHARS:  # Node prefix
+            part, pos = self._parse_string(source, pos, alphabet=STRING_CHARS, error_msg=error_msg)
+            return render_part(part), pos
+        elif match:
+            return match[0], end
+        else:
+            raise ParseError(error_msg, source[pos:])
+
+    def _parse_list(self, source: str, pos: int, *, exclude: str='', end: str='', error_msg: str='', kwargs: Attributes=None) -> tuple[list[Part], int]:
+        return self._run(source, pos, _ListFrame(exclude, end, error_msg, kwargs))
+
+    def _run(self, source: str, pos: int, frame: '_Frame', marker: str='') -> tuple[object, int]:
+        # `marker` starts template variables in text, though not in data fields
+        length = len(source)
+        prefixes = self._nodes.prefixes + marker
+        stack = [frame]
+        depth = 0  # Open text fields, counting the one `frame` may be
+        if isinstance(frame, _ListFrame) and frame.node is not None:
+            depth = 1
+            if self.max_depth is not None and depth > self.max_depth:
+                raise ParseError('Maximum nesting depth exceeded', source[pos:])
+        value = None  # Result of the frame most recently finished
+        while True:
+            frame = stack[-1]
+            if isinstance(frame, _StringFrame):
+                if value is not None:
+                    frame.part.append(value)
+                    value = None
+                text = frame.text
+                alphabet, exclude, resolve = frame.alphabet, frame.exclude, frame.resolve
+                match_run = text_run(alphabet, exclude, prefixes, resolve).match
+                while True:
+                    match = match_run(source, pos)
+                    if match:
+                        text.append(match[0])
+                        pos = match.end()
+                    if pos >= length or not is_valid_char(source[pos], alphabet, exclude):
+                        break
+                    elif source[pos] == '\\':
+                        if pos + 1 >= length:
+                            raise ParseError('Incomplete escape sequence', source[pos:])
+                        elif resolve:  # \n, kept apart so it isn't indented
+                            if text:
+                                frame.part.append(Text(resolve_escapes(''.join(text))))
+                                text.clear()
+                            frame.part.append(NEWLINE)
+                            pos += 2
+                        else:
+                            text.append(source[pos:pos+2])
+                            pos += 2
+                    elif source[pos] == marker and not source.startswith(tuple(STRING_CHARS), pos+1):
+                        text.append(marker)  # Not followed by a name, so just text
+                        pos += 1
+                    else:  # Node prefix or template marker
+                        if text:
+                            frame.part.append(Text(resolve_escapes(''.join(text))) if resolve else ''.join(text))
+                            text.clear()
+                        if source[pos] == marker:
+                            name, pos = self._parse_word(source, pos+1, error_msg='Invalid variable name')
+                            frame.part.append(Variable(name, resolve))
+                            continue
+                        child, pos, inner = self._parse_header(source, pos, kwargs=frame.kwargs, resolve=resolve)
+                        if inner is None:
+                            frame.part.append(child)
+                        else:
+                            depth += 1
+                            if self.max_depth is not None and depth > self.max_depth:
+                                raise ParseError('Maximum nesting depth exceeded', source[pos:])
+                            stack.append(inner)
+                            break
+                if stack[-1] is not frame:
+                    continue
+                if text:
+                    frame.part.append(Text(resolve_escapes(''.join(text))) if resolve else ''.join(text))
+                if not frame.part and frame.error_msg:
+                    raise ParseError(frame.error_msg, source[pos:])
+                value = frame.part
+
+            else:  # List frame
+                if value is not None:
+                    if frame.quoted:
+                        if pos >= length:
+                            raise ParseError('Incomplete string', '')
+                        elif source[pos] != '"':
+                            raise ParseError('Invalid character', source[pos:])
+                        pos += 1
+                    frame.parts.append(value)
+                    value = None
+                end = frame.end
+                while pos < length and source[pos] not in end and source[pos] in string.whitespace:
+                    pos = WHITESPACE.match(source, pos).end()
+                if pos < length and source[pos] not in end:
+                    if source[pos] == '"':
+                        frame.quoted = True
+                        stack.append(_StringFrame('', frame.exclude + '"', '', frame.kwargs, frame.resolve))
+                        pos += 1
+                    else:
+                        frame.quoted = False
+                        stack.append(_StringFrame('', frame.exclude + end + '"' + string.whitespace, 'Invalid character', frame.kwargs, frame.resolve))
+                    continue
+                if end and pos >= length:
+                    raise ParseError(frame.error_msg, '')
+                if frame.node is None:
+                    value = frame.parts
+                else:
+                    depth -= 1
+                    value = self._make_element(*frame.node, frame.parts)
+                    pos += 1
+
+            stack.pop()
+            if not stack:
+                return value, pos
+
+
+def make_element(node: type[Node], id: str, classes: list[str], data: Attributes, text: list[Part]) -> Child:
+    # Nodes that aren't streamed are made again once their text is rendered
+    try:
+        return Element(node(id, classes, data), text, None if node.streamable else (id, classes, data))
+    except nodes.MarkupError as e:
+        return Error(e.message)
+    except Exception as e:
+        return Error(f'{type(e).__name__}: {e}')
+
+
+WHITESPACE = re.compile(f'[{re.escape(string.whitespace)}]+')
+
+class _StringFrame:
+    __slots__ = ('alphabet', 'exclude', 'error_msg', 'kwargs', 'resolve', 'part', 'text')
+
+    def __init__(self, alphabet: str, exclude: str, error_msg: str, kwargs: Attributes, resolve: bool=False) -> None:
+        self.alphabet = alphabet
+        self.exclude = exclude
+        self.error_msg = error_msg
+        self.kwargs = kwargs
+        self.resolve = resolve  # Whether text runs are made Text with their escapes resolved
+        self.part = []
+        self.text = []
+
+
+class _ListFrame:
+    __slots__ = ('exclude', 'end', 'error_msg', 'kwargs', 'node', 'resolve', 'parts', 'quoted')
+
+    def __init__(self, exclude: str, end: str, error_msg: str, kwargs: Attributes, node: tuple=None, resolve: bool=False) -> None:
+        self.exclude = exclude
+        self.end = end
+        self.error_msg = error_msg
+        self.kwargs = kwargs
+        self.node = node  # (class, id, classes, data) if this is a node's text field
+        self.resolve = resolve
+        self.parts = []
+        self.quoted = False
+
+
+_Frame = Union[_StringFrame, _ListFrame]
@@ -0,0 +1,113 @@
+import time
+from typing import Callable, Optional
+from .nodes import Node
+
+class NodeStats:
+    __slots__ = ('calls', 'data_time', 'build_time', 'render_self', 'render_total', 'output_bytes', 'active')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.data_time = 0.0  # Parsing the data field
+        self.build_time = 0.0  # Constructing the node
+        self.render_self = 0.0
+        self.render_total = 0.0  # Including nested elements
+        self.output_bytes = 0  # UTF-8 encoded, including nested elements
+        self.active = 0  # Elements of this class currently being rendered
+
+    @property
+    def self_time(self) -> float:
+        return self.data_time + self.build_time + self.render_self
+
+    @property
+    def total_time(self) -> float:
+        return self.data_time + self.build_time + self.render_total
+
+
+class _Open:
+    __slots__ = ('stats', 'parent', 'time', 'bytes')
+
+    def __init__(self, stats: NodeStats, parent: Optional['_Open']) -> None:
+        self.stats = stats
+        self.parent = parent
+        self.time = 0.0
+        self.bytes = 0
+
+
+class Profiler:
+    # Collects per-node-class timings from a Markup it is given to. Text outside
+    # any node is charged to the document, under the class None. As with
+    # cProfile, time and output of elements nested in one of the same class are
+    # only counted once in the totals. Not thread-safe.
+    def __init__(self) -> None:
+        self.stats: dict[Optional[type[Node]], NodeStats] = {}
+
+    def clear(self) -> None:
+        self.stats.clear()
+
+    def _stats(self, cls: Optional[type[Node]]) -> NodeStats:
+        stats = self.stats.get(cls)
+        if stats is None:
+            stats = self.stats[cls] = NodeStats()
+        return stats
+
+    def call(self, phase: str, cls: type[Node], function: Callable, *args, **kwargs) -> object:
+        stats = self._stats(cls)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            if phase == 'data':
+                stats.calls += 1
+                stats.data_time += elapsed
+            else:
+                stats.build_time += elapsed
+
+    def open(self, cls: Optional[type[Node]], parent: Optional[_Open]=None) -> _Open:
+        stats = self._stats(cls)
+        if cls is None:
+            stats.calls += 1
+        stats.active += 1
+        return _Open(stats, parent)
+
+    def charge(self, element: _Open, elapsed: float, chunk: str='') -> None:
+        element.stats.render_self += elapsed
+        element.time += elapsed
+        if chunk:
+            element.bytes += len(chunk.encode())
+
+    def close(self, element: _Open) -> None:
+        stats = element.stats
+        stats.active -= 1
+        if not stats.active:
+            stats.render_total += element.time
+            stats.output_bytes += element.bytes
+        if element.parent is not None:
+            element.parent.time += element.time
+            element.parent.bytes += element.bytes
+
+    def report(self) -> list[dict]:
+        # Most expensive first
+        return [
+            {
+                'node': '(document)' if cls is None else cls.__name__,
+                'calls': stats.calls,
+                'data_time': stats.data_time,
+                'build_time': stats.build_time,
+                'render_self': stats.render_self,
+                'render_total': stats.render_total,
+                'self_time': stats.self_time,
+                'total_time': stats.total_time,
+                'output_bytes': stats.output_bytes,
+            }
+            for cls, stats in sorted(self.stats.items(), key=lambda item: item[1].self_time, reverse=True)
+        ]
+
+    def format(self) -> str:
+        lines = [f'{"node":<20} {"calls":>8} {"self ms":>10} {"total ms":>10} {"data ms":>10} {"build ms":>10} {"bytes":>12}']
+        for row in self.report():
+            lines.append(
+                f'{row["node"]:<20} {row["calls"]:>8} {row["self_time"]*1e3:>10.3f} {row["total_time"]*1e3:>10.3f} '
+                f'{row["data_time"]*1e3:>10.3f} {row["build_time"]*1e3:>10.3f} {row["output_bytes"]:>12}'
+            )
+        return '\n'.join(lines)
@@ -0,0 +1,115 @@
+import marshal
+import zlib
+from .cache import fingerprint
+from .nodes import Registry
+from .tree import Document, Element, Error, RawText, Text, Variable
+
+MAGIC = 'markup-tree'
+VERSION = 2
+
+# The header is followed by the document compressed, so it can be checked
+# without decompressing anything. The document is stored as one flat list,
+# since marshal can't nest deeply.
+# Resolved text runs are stored as bare strings, being the commonest child;
+# the rest are written after one of these. An element is followed by the
+# index of its node, and the args it's made again from, in a table of the
+# distinct nodes, then by its parts, each between _PART and _END, and then by
+# an _END of its own.
+_STR, _RAW, _ERROR, _ELEMENT, _PART, _END = range(6)
+
+def dumps(document: Document, registry: Registry) -> bytes:
+    body = zlib.compress(marshal.dumps(_encode(document, registry)))
+    return marshal.dumps((MAGIC, VERSION, fingerprint(registry), body))
+
+
+def loads(data: bytes, registry: Registry) -> Document:
+    # Documents stored with other nodes, or other versions of them, are rejected
+    try:
+        magic, version, nodes, body = marshal.loads(data)
+    except (EOFError, TypeError, ValueError):
+        raise ValueError('not a serialized document') from None
+    if magic != MAGIC:
+        raise ValueError('not a serialized document')
+    elif version != VERSION:
+        raise ValueError(f'unsupported format version: {version}')
+    elif nodes != fingerprint(registry):
+        raise ValueError('document was serialized with other nodes')
+    return _decode(*marshal.loads(zlib.decompress(body)), registry)
+
+
+def _encode(document: Document, registry: Registry) -> tuple[list, list]:
+    # Nodes are stored by the command their class is registered under, along
+    # with their marshalled state
+    commands = {}
+    for command, node in registry.commands.items():
+        commands.setdefault(node, command)
+    table = {}
+    items = []
+    append = items.append
+    stack = [[iter(document), iter(()), False]]  # [children left, parts left, in a part]
+    while stack:
+        frame = stack[-1]
+        for child in frame[0]:
+            if type(child) is Text:
+                append(str(child))
+            elif type(child) is RawText:
+                append(_RAW)
+                append(str(child))
+            elif isinstance(child, str):
+                append(_STR)
+                append(str(child))
+            elif isinstance(child, Error):
+                append(_ERROR)
+                append(child.message)
+            elif isinstance(child, Variable):
+                raise ValueError('template variables cannot be serialized')
+            else:
+                command = commands.get(type(child.node))
+                if command is None:
+                    raise ValueError(f'{type(child.node).__name__} is not registered')
+                append(_ELEMENT)
+                append(table.setdefault((command, marshal.dumps((vars(child.node), child.args))), len(table)))
+                stack.append([iter(()), iter(child.text), False])
+                break
+        else:
+            if frame[2]:
+                append(_END)
+            part = next(frame[1], None)
+            if part is not None:
+                append(_PART)
+                frame[0], frame[2] = iter(part), True
+                continue
+            stack.pop()
+            if stack:
+                append(_END)
+    return list(table), items
+
+
+def _decode(table: list, items: list, registry: Registry) -> Document:
+    nodes = [(registry.commands[command], state) for command, state in table]
+    document = []
+    stack = [document]  # The part, or element's list of parts, being filled
+    items = iter(items)
+    for item in items:
+        if type(item) is str:
+            stack[-1].append(Text(item))
+        elif item == _PART:
+            stack[-1].append([])
+            stack.append(stack[-1][-1])
+        elif item == _END:
+            stack.pop()
+        elif item == _STR:
+            stack[-1].append(next(items))
+        elif item == _RAW:
+            stack[-1].append(RawText(next(items)))
+        elif item == _ERROR:
+            stack[-1].append(Error(next(items)))
+        else:
+            cls, state = nodes[next(items)]
+            state, args = marshal.loads(state)
+            node = cls.__new__(cls)
+            node.__dict__.update(state)
+            element = Element(node, [], args)
+            stack[-1].append(element)
+            stack.append(element.text)
+    return document
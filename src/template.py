@@ -0,0 +1,123 @@
+import re
+from typing import Iterator, Mapping, Union
+from .tree import Document, Element, Slot, Text, Variable, _indent, _iter_part, is_streamable
+
+class Template:
+    # A document rendered ahead of time apart from its variables, and the
+    # elements containing them that can't be streamed, which are filled in
+    # from their values on each render
+    def __init__(self, chunks: list[Union[str, Slot]], names: set[str]=frozenset(), *, compact: bool=False) -> None:
+        self.chunks = chunks
+        self.names = names
+        self.compact = compact
+
+    def render(self, values: Mapping[str, object]) -> str:
+        output = []
+        for chunk in self.chunks:
+            if type(chunk) is str:
+                output.append(chunk)
+            elif type(chunk.child) is Variable:
+                output.append(_indent(str(values[chunk.child.name]), chunk.depth))
+            else:
+                output.extend(_iter_chunks([_iter_part([_fill(chunk.child, values)], chunk.depth, self.compact)]))
+        return ''.join(output)
+
+
+def compile_template(document: Document, *, depth: int=0, compact: bool=False) -> Template:
+    if compact:
+        depth = 0
+    document, names = _slots(document)
+    chunks = []
+    static = []
+    for chunk in _iter_chunks([_iter_part(document, depth, compact, start=True)]):
+        if isinstance(chunk, str):
+            static.append(chunk)
+        else:
+            if static:
+                chunks.append(''.join(static))
+                static.clear()
+            chunks.append(chunk)
+    if static:
+        chunks.append(''.join(static))
+    return Template(chunks, names, compact=compact)
+
+
+def _iter_chunks(stack: list[Iterator]) -> Iterator[Union[str, Slot]]:
+    # As iter_render, passing slots through
+    while stack:
+        for chunk in stack[-1]:
+            if isinstance(chunk, str) or type(chunk) is Slot:
+                yield chunk
+            else:
+                stack.append(chunk[1] if type(chunk) is tuple else chunk)
+                break
+        else:
+            stack.pop()
+
+
+def _slots(document: Document) -> tuple[Document, set[str]]:
+    # Copies the document with each variable, and each element containing one
+    # that can't be streamed, replaced by a slot. Elements are first walked
+    # with their parents, to mark the ones containing variables.
+    names = set()
+    parents = {}
+    marked = set()
+    stack = [(document, None)]
+    while stack:
+        part, parent = stack.pop()
+        for child in part:
+            if type(child) is Variable:
+                names.add(child.name)
+                while parent is not None and id(parent) not in marked:
+                    marked.add(id(parent))
+                    parent = parents[id(parent)]
+            elif isinstance(child, Element):
+                parents[id(child)] = parent
+                stack.extend((text, child) for text in child.text)
+
+    copy = []
+    stack = [(copy, document)]
+    while stack:
+        new, part = stack.pop()
+        for child in part:
+            if type(child) is Variable:
+                new.append(Slot(child))
+            elif isinstance(child, Element) and id(child) in marked:
+                if is_streamable(type(child.node)):
+                    element = Element(child.node, [], child.args)
+                    new.append(element)
+                    for text in child.text:
+                        element.text.append([])
+                        stack.append((element.text[-1], text))
+                else:
+                    new.append(Slot(child))
+            else:
+                new.append(child)
+    return copy, names
+
+
+def _fill(element: Element, values: Mapping[str, object]) -> Element:
+    # Copies the element with its variables replaced by their values, as text
+    # that's written as is, or escaped where the node sees its text unresolved
+    copy = Element(element.node, [], element.args)
+    stack = [(copy.text, element.text)]
+    while stack:
+        text, parts = stack.pop()
+        for part in parts:
+            new = []
+            text.append(new)
+            for child in part:
+                if type(child) is Variable:
+                    value = str(values[child.name])
+                    new.append(Text(value) if child.resolved else _escape(value))
+                elif isinstance(child, Element):
+                    element = Element(child.node, [], child.args)
+                    new.append(element)
+                    stack.append((element.text, child.text))
+                else:
+                    new.append(child)
+    return copy
+
+
+def _escape(value: str) -> str:
+    return re.sub(r'(\W)', r'\\\1', value)
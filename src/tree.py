@@ -0,0 +1,349 @@
+import re
+import time
+from typing import Iterator, Optional, Union
+from .html import BLOCK, COMPACT, VOID, format_attributes
+from .nodes import MarkupError, Node
+from .profiling import Profiler
+
+class Error:
+    __slots__ = ('message',)
+
+    def __init__(self, message: str) -> None:
+        self.message = message
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Error) and self.message == other.message
+
+    def __repr__(self) -> str:
+        return f'Error({self.message!r})'
+
+
+class Element:
+    # `args` are the id, classes and data the node was made from, kept for
+    # nodes that aren't streamed, as they're made again with their rendered text
+    __slots__ = ('node', 'text', 'args')
+
+    def __init__(self, node: Node, text: list['Part']=None, args: tuple=None) -> None:
+        self.node = node
+        self.text = text or []
+        self.args = args
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, Element)
+            and type(self.node) is type(other.node)
+            and self.node.attributes == other.node.attributes
+            and self.node.data == other.node.data
+            and self.text == other.text
+        )
+
+    def __repr__(self) -> str:
+        return f'Element({type(self.node).__name__}, {self.node.attributes!r}, {self.node.data!r}, {self.text!r})'
+
+
+class Variable:
+    # A template placeholder, filled in with its value as literal text.
+    # `resolved` is whether it was lexed in text whose escapes are resolved.
+    __slots__ = ('name', 'resolved')
+
+    def __init__(self, name: str, resolved: bool=False) -> None:
+        self.name = name
+        self.resolved = resolved
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Variable) and self.name == other.name
+
+    def __repr__(self) -> str:
+        return f'Variable({self.name!r})'
+
+
+class Slot:
+    # Stands in for a variable, or an element containing one, in a document
+    # being compiled into a template, and is yielded by _iter_part along with
+    # the depth it's to be written at
+    __slots__ = ('child', 'depth')
+
+    def __init__(self, child: Union[Variable, Element], depth: int=0) -> None:
+        self.child = child
+        self.depth = depth
+
+
+class Text(str):
+    # A text run whose escapes the parser has already resolved, so it's only
+    # indented when written
+    __slots__ = ()
+
+
+class RawText(str):
+    # Resolved text written exactly as is, such as an escaped newline
+    __slots__ = ()
+
+
+NEWLINE = RawText('\n')
+
+# A part is one whitespace-separated item of a text field, made of text runs,
+# elements and error markers; a document is the part at the top level. Plain
+# str runs keep their escapes, which are resolved as they're written.
+Child = Union[str, Element, Error]
+Part = list[Child]
+Document = Part
+
+def error(msg: str) -> str:
+    return f'<span class="error">&lt;{msg}&gt;</span>'
+
+
+def unescape(string: str) -> str:
+    escapes = {
+        'n': '\n',
+    }
+    return re.sub(r'\\(.)', lambda m: escapes.get(m[1], m[1]), string, flags=re.S)
+
+
+def _unescape(chunk: str) -> str:
+    return unescape(chunk) if '\\' in chunk else chunk
+
+
+def render(document: Document, *, depth: int=0, compact: bool=False, profiler: Optional[Profiler]=None) -> str:
+    return ''.join(iter_render(document, depth=depth, compact=compact, profiler=profiler))
+
+
+def iter_render(document: Document, *, depth: int=0, compact: bool=False, profiler: Optional[Profiler]=None) -> Iterator[str]:
+    # Each chunk is indented as it is produced, and any escapes left in it are
+    # resolved after that, so escaped newlines aren't indented. Nested elements are
+    # yielded as generators (paired with their node) and driven from an
+    # explicit stack. Compact output has no indentation and lays out block
+    # contents inline.
+    if compact:
+        depth = 0
+    stack = [_iter_part(document, depth, compact, start=True)]
+    if profiler is not None:
+        yield from _iter_profiled(stack, profiler)
+        return
+    while stack:
+        for chunk in stack[-1]:
+            if isinstance(chunk, str):
+                yield chunk
+            else:
+                stack.append(chunk[1] if type(chunk) is tuple else chunk)
+                break
+        else:
+            stack.pop()
+
+
+def _iter_profiled(stack: list[Iterator], profiler: Profiler) -> Iterator[str]:
+    # As iter_render, but times each step of the generator on top of the stack
+    # and charges it to the innermost element being written
+    clock = time.perf_counter
+    owners = [profiler.open(None)]  # The open element each generator belongs to
+    while stack:
+        start = clock()
+        chunk = next(stack[-1], None)
+        if isinstance(chunk, str):
+            profiler.charge(owners[-1], clock() - start, chunk)
+            yield chunk
+        elif chunk is None:
+            stack.pop()
+            owner = owners.pop()
+            profiler.charge(owner, clock() - start)
+            if not owners or owner is not owners[-1]:
+                profiler.close(owner)
+        else:
+            if type(chunk) is tuple:
+                node, chunk = chunk
+                owners.append(profiler.open(type(node), owners[-1]))
+            else:
+                owners.append(owners[-1])
+            stack.append(chunk)
+            profiler.charge(owners[-2], clock() - start)
+
+
+def _iter_part(part: Part, depth: int, compact: bool, *, start: bool=False) -> Iterator[Union[str, Iterator]]:
+    if start and depth:
+        yield '    '*depth
+    for child in part:
+        if type(child) is Text:
+            yield _indent(child, depth)
+        elif type(child) is RawText:
+            yield child
+        elif isinstance(child, str):
+            yield _unescape(_indent(child, depth))
+        elif isinstance(child, Error):
+            yield _unescape(error(child.message))
+        elif type(child) is Slot:
+            yield Slot(child.child, depth)
+        elif is_streamable(type(child.node)):
+            yield child.node, _iter_element(child, depth, compact)
+        else:
+            yield child.node, _iter_stashed(child, depth, compact)
+
+
+def _iter_element(element: Element, depth: int, compact: bool) -> Iterator[Union[str, Iterator]]:
+    node = element.node
+    try:
+        tag = node.tag
+        open = f'{tag} {format_attributes(node.make_attributes())}'.strip()
+    except MarkupError as e:
+        yield _unescape(error(e.message))
+        return
+    except Exception as e:
+        yield _unescape(error(f'{type(e).__name__}: {e}'))
+        return
+
+    open = _unescape(_indent(open, depth))
+    if tag in VOID:
+        yield f'<{open} />'
+    elif tag in BLOCK and not compact:
+        newline = '\n' + '    '*(depth+1)
+        yield f'<{open}>{newline}'
+        for i, part in enumerate(element.text):
+            if i:
+                yield newline
+            yield _iter_part(part, depth+1, compact)
+        yield f'\n{"    "*depth}</{tag}>'
+    else:
+        yield f'<{open}>'
+        # Compact blocks skip blank lines as html() does
+        parts = filter(None, element.text) if tag in BLOCK else element.text
+        for i, part in enumerate(parts):
+            if i:
+                yield ' '
+            yield _iter_part(part, depth, compact)
+        yield f'</{tag}>'
+
+
+def _iter_stashed(element: Element, depth: int, compact: bool) -> Iterator[Union[str, Iterator]]:
+    # Renders the node with a placeholder standing in for each nested element,
+    # then writes the nested elements at the placeholders once each piece of
+    # the node's own html has been laid out. Any indentation html() gives a placeholder ends
+    # up after the newline inside it, which says how deep to write the element.
+    # Only nodes with opaque text get placeholders; the rest are given their
+    # nested elements already rendered, as they may read or change them.
+    if not element.node.opaque_text:
+        text = [''.join(render_child(child, compact=compact) for child in part) for part in element.text]
+        for output in _iter_node(element, text, compact=compact):
+            yield _unescape(_indent(output, depth))
+        return
+    stash = []
+    text = []
+    for part in element.text:
+        pieces = []
+        for child in part:
+            if isinstance(child, Element) or isinstance(child, str) and STX in child:
+                pieces.append(f'{STX}\n{len(stash)}{ETX}')
+                stash.append(child)
+            elif isinstance(child, str):
+                pieces.append(child)
+            else:
+                pieces.append(error(child.message))
+        text.append(''.join(pieces))
+    for output in _iter_node(element, text, compact=compact):
+        if not stash:
+            yield _unescape(_indent(output, depth))
+            continue
+        pieces = PLACEHOLDER.split(output)
+        for i in range(0, len(pieces)-1, 3):
+            yield _unescape(_indent(pieces[i], depth))
+            level = depth + len(pieces[i+1]) // 4
+            yield _iter_part([stash[int(pieces[i+2])]], level, compact)
+        yield _unescape(_indent(pieces[-1], depth))
+
+
+STX, ETX = '\x02', '\x03'
+PLACEHOLDER = re.compile(f'{STX}\n( *)(\\d+){ETX}')
+
+def is_streamable(cls: type[Node]) -> bool:
+    # Nodes that render their text unchanged can be written out piece by piece
+    return cls.streamable
+
+
+def _indent(text: str, depth: int) -> str:
+    if depth and '\n' in text:
+        return text.replace('\n', '\n' + '    '*depth)
+    return text
+
+
+def render_part(part: Part) -> str:
+    return ''.join(map(render_child, part))
+
+
+def render_child(child: Child, *, compact: bool=False) -> str:
+    if isinstance(child, str):
+        return child
+    elif isinstance(child, Error):
+        return error(child.message)
+    else:
+        return render_element(child, compact=compact)
+
+
+def render_element(element: Element, *, compact: bool=False) -> str:
+    # Renders nested elements bottom-up from an explicit stack of
+    # [element, remaining parts, remaining children, current part, rendered parts]
+    stack = [[element, iter(element.text), iter(()), None, []]]
+    while True:
+        frame = stack[-1]
+        element, parts, children, pieces, rendered = frame
+        for child in children:
+            if isinstance(child, Element):
+                stack.append([child, iter(child.text), iter(()), None, []])
+                break
+            pieces.append(child if isinstance(child, str) else error(child.message))
+        else:
+            if pieces is not None:
+                rendered.append(''.join(pieces))
+            part = next(parts, None)
+            if part is not None:
+                frame[2:4] = iter(part), []
+                continue
+            output = _render_node(element, rendered, compact=compact)
+            stack.pop()
+            if not stack:
+                return output
+            stack[-1][3].append(output)
+
+
+def _iter_node(element: Element, text: list[str], *, compact: bool=False) -> Iterator[str]:
+    # As _render_node, for nodes that write their html a piece at a time. A
+    # node that fails partway through has the error written after what it
+    # had produced, so nodes should raise their MarkupErrors up front.
+    chunks = None
+    while True:
+        token = COMPACT.set(compact)
+        try:
+            if chunks is None:
+                node = _build(element, text)
+                if element.args is not None and type(node).__str__ is not Node.__str__:
+                    chunks = iter([str(node)])
+                else:
+                    chunks = node.iter_render(text)
+            chunk = next(chunks, None)
+        except MarkupError as e:
+            chunk, chunks = error(e.message), iter(())
+        except Exception as e:
+            chunk, chunks = error(f'{type(e).__name__}: {e}'), iter(())
+        finally:
+            COMPACT.reset(token)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def _render_node(element: Element, text: list[str], *, compact: bool=False) -> str:
+    token = COMPACT.set(compact)
+    try:
+        if element.args is not None:
+            return str(_build(element, text))
+        return element.node.render(text)
+    except MarkupError as e:
+        return error(e.message)
+    except Exception as e:
+        return error(f'{type(e).__name__}: {e}')
+    finally:
+        COMPACT.reset(token)
+
+
+def _build(element: Element, text: list[str]) -> Node:
+    # Nodes that aren't streamed are made with their rendered text, as they
+    # always were; elements made by hand have no args, so use their node as is
+    if element.args is None:
+        return element.node
+    return type(element.node)(*element.args, text)
@@ -1,15 +1,21 @@
+from typing import Iterator
+
 def partition(strings: list[str], separator: str) -> list[list[str]]:
-    parts = []
-    i = 0
-    while i < len(strings):
-        if strings[i] == separator:
-            parts.append(strip(strings[:i]))
-            strings = strings[i+1:]
-            i = 0
-        else:
-            i += 1
-    parts.append(strip(strings))
-    return parts
+    return list(ipartition(strings, separator))
+
+
+def ipartition(strings: list[str], separator: str) -> Iterator[list[str]]:
+    # Lazy partition, finding each separator from the last one, so every part
+    # is only copied once
+    start = 0
+    while True:
+        try:
+            end = strings.index(separator, start)
+        except ValueError:
+            break
+        yield _strip(strings, start, end)
+        start = end + 1
+    yield _strip(strings, start, len(strings))
 
 
 def strip(strings: list[str]) -> list[str]:
@@ -18,3 +24,12 @@ def strip(strings: list[str]) -> list[str]:
     if strings and strings[-1].isspace():
         strings = strings[:-1]
     return strings
+
+
+def _strip(strings: list[str], start: int, end: int) -> list[str]:
+    # strip(strings[start:end]) with a single slice
+    if start < end and strings[start].isspace():
+        start += 1
+    if start < end and strings[end-1].isspace():
+        end -= 1
+    return strings[start:end]
@@ -107,3 +107,31 @@ class Test_parse_data:
         data = ['baz', 'bif', 'oof']
         with raises(base.InvalidData):
             base.parse_data(data, params)
+
+
+@staticmethods
+class Test_ParamSpec:
+    def test_compiled_once_per_class():
+        class BarNode(base.Node):
+            params = {'foo': None, 'bar?': False}
+        spec = BarNode.spec
+        assert BarNode._parse_data(['baz']) == ({'foo': 'baz', 'bar': False}, {})
+        assert BarNode.spec is spec
+        assert FooNode.spec.bind([]) == {}
+
+    def test_invalid_params_are_an_error_when_class_is_defined():
+        with raises(TypeError, match='BarNode'):
+            class BarNode(base.Node):
+                params = {'foo': None, 'foo?': False}
+        with raises(TypeError):
+            class BarNode(base.Node):
+                params = {'*': None}
+        with raises(TypeError):
+            class BarNode(base.Node):
+                params = {'=': None}
+
+    def test_defaults_are_not_shared():
+        class BarNode(base.Node):
+            params = {'foo=': 'a'}
+        BarNode.default_data()['foo'] = 'b'
+        assert BarNode().data == {'foo': 'a'}
@@ -0,0 +1,54 @@
+import pytest
+from pytest import raises
+from ..utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src.nodes import base, registry
+
+class FooNode(base.Node):
+    tag = 'foo'
+
+
+class BarNode(base.Node):
+    tag = 'bar'
+
+
+@staticmethods
+class Test_Registry:
+    def test_behaves_like_a_dict_of_dicts():
+        nodes = registry.Registry({'$': {'foo': FooNode}})
+        assert nodes == {'$': {'foo': FooNode}}
+        assert nodes['$']['foo'] is FooNode
+        assert list(nodes) == ['$']
+
+    def test_looks_up_commands_by_prefix():
+        nodes = registry.Registry({'$': {'foo': FooNode}, '@': {'foo': BarNode}})
+        assert nodes.lookup('$', 'foo') is FooNode
+        assert nodes.lookup('@', 'foo') is BarNode
+        assert nodes.lookup('$', 'bar') is None
+        assert nodes.lookup('%', 'foo') is None
+
+    def test_registering_a_command_updates_the_lookup():
+        nodes = registry.Registry({'$': {}})
+        version = nodes.version
+        nodes['$']['bar'] = BarNode
+        assert nodes.lookup('$', 'bar') is BarNode
+        del nodes['$']['bar']
+        assert nodes.lookup('$', 'bar') is None
+        assert nodes.version == version + 2
+
+    def test_copies_the_mapping_it_is_made_from():
+        table = {'$': {}}
+        nodes = registry.Registry(table)
+        table['$']['foo'] = FooNode
+        assert nodes.lookup('$', 'foo') is None
+
+    def test_registering_a_prefix_updates_the_prefixes():
+        nodes = registry.Registry({'$': {}})
+        nodes['@'] = {'foo': FooNode}
+        assert nodes.prefixes == '$@'
+        assert nodes.lookup('@', 'foo') is FooNode
+        del nodes['$']
+        assert nodes.prefixes == '@'
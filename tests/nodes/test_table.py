@@ -5,6 +5,7 @@ from ..utils import staticmethods
 skip = pytest.mark.skip
 xfail = pytest.mark.xfail
 
+from markup.src import parse
 from markup.src.nodes import table
 
 @staticmethods
@@ -42,6 +43,17 @@ class Test_TableNode:
     def test_first_row_and_column_are_heading_cells_if_rows_and_cols_in_header_data_arg():
         assert table.TableNode(data={'headers': 'rows,cols'}).make_content(['foo', '|', 'bar', '/', 'baz', '|', 'bif']) == ['<tr>\n    <th>foo</th>\n    <th>bar</th>\n</tr>', '<tr>\n    <th>baz</th>\n    <td>bif</td>\n</tr>']
 
+    def test_subclasses_can_change_the_content():
+        class TotalsNode(table.TableNode):
+            def make_content(self, text: list[str]) -> list[str]:
+                return ['<caption>Totals</caption>'] + super().make_content(text)
+        markup = parse.Markup()
+        markup.nodes['$']['totals'] = TotalsNode
+        expected = '<table>\n    <caption>Totals</caption>\n    <tr>\n        <td>a</td>\n    </tr>\n</table>'
+        assert markup.parse('$totals{a}') == expected
+        assert ''.join(markup.parse_iter('$totals{a}')) == expected
+        assert TotalsNode(data={'headers': ''}).render(['a']) == expected
+
 
 @staticmethods
 class Test_merge_left:
@@ -108,80 +120,110 @@ def _make_row(row: str) -> list[dict]:
     return reduce(table._merge_left, [[cell] for cell in row.split()], [])
 
 
+def _split(row: str) -> list[list[str]]:
+    return [[cell] for cell in row.split()]
+
+
 @staticmethods
-class Test_merge_up:
-    def test_row_with_carets_cannot_be_merged_into_empty_table():
-        row = _make_row('foo < ^ . . bar')
-        with raises(table.MarkupError):
-            table._merge_up([], row)
+class Test_merge_rows:
+    def test_row_with_carets_cannot_be_first_row():
+        with raises(table.MarkupError, match='Invalid cell merge'):
+            list(table._merge_rows([_split('foo < ^ . . bar')]))
 
     def test_caret_must_be_aligned_with_some_cell_in_last_row_of_table():
-        table_ = [
-            _make_row('foo < bar < < baz'),
-        ]
+        with raises(table.MarkupError, match='Misaligned table cell'):
+            list(table._merge_rows([_split('foo < bar < < baz'), _split('foo ^ bar < < <')]))
 
-        row = _make_row('foo ^ bar < < <')
-        with raises(table.MarkupError):
-            table._merge_up(table_, row)
-
-        row = _make_row('foo < ^ bar < <')
-        with raises(table.MarkupError):
-            table._merge_up(table_, row)
+        with raises(table.MarkupError, match='Misaligned table cell'):
+            list(table._merge_rows([_split('foo < bar < < baz'), _split('foo < ^ bar < <')]))
 
-        row = _make_row('foo < ^ . . bar')
         _row_1 = _make_row('foo < bar < < baz')
         _row_1[1]['rows'] = 2
-        assert table._merge_up(table_, row) == [
+        assert list(table._merge_rows([_split('foo < bar < < baz'), _split('foo < ^ . . bar')])) == [
             _row_1,
             _make_row('foo < ^ . . bar'),
         ]
 
     def test_caret_increases_rowspan_of_lowest_aligned_non_caret_cell():
-        table_ = [
-            _make_row('foo < bar < < baz'),
-            _make_row('foo < bar < < baz'),
-            _make_row('foo < bar < < baz'),
-        ]
-        row = _make_row('foo < ^ . . bar')
         _row_3 = _make_row('foo < bar < < baz')
         _row_3[1]['rows'] = 2
-        assert table._merge_up(table_, row) == [
+        assert list(table._merge_rows([_split('foo < bar < < baz')] * 3 + [_split('foo < ^ . . bar')])) == [
             _make_row('foo < bar < < baz'),
             _make_row('foo < bar < < baz'),
             _row_3,
             _make_row('foo < ^ . . bar'),
         ]
 
+    def test_carets_merge_through_carets_above():
+        _row_1 = _make_row('foo bar')
+        _row_1[0]['rows'] = 3
+        assert list(table._merge_rows([_split('foo bar'), _split('^ baz'), _split('^ bif')])) == [
+            _row_1,
+            _make_row('^ baz'),
+            _make_row('^ bif'),
+        ]
+
+    def test_caret_must_be_as_wide_as_the_cell_it_merges_into():
+        with raises(table.MarkupError, match='Misaligned table cell'):
+            list(table._merge_rows([_split('foo < bar'), _split('^ . baz'), _split('^ bif baz')]))
+
+    def test_rows_are_yielded_once_their_rowspans_are_final():
+        consumed = []
+        def table_():
+            for row in ['foo bar', 'baz ^', 'bif oof', 'rab zab']:
+                consumed.append(row)
+                yield _split(row)
+        rows = table._merge_rows(table_())
+        _row_1 = _make_row('foo bar')
+        _row_1[1]['rows'] = 2
+        assert next(rows) == _row_1
+        assert consumed == ['foo bar', 'baz ^', 'bif oof']
+        assert next(rows)[0]['data'] == ['baz']
+        assert consumed == ['foo bar', 'baz ^', 'bif oof']
+
+    def test_table_is_checked_before_any_rows_are_written():
+        node = table.TableNode(data={'headers': ''})
+        with raises(table.MarkupError):
+            node.iter_render(['a', '/', 'b', '|', 'c'])
+        with raises(table.MarkupError):
+            node.iter_render(['a', '/', 'b', '/', '<'])
+
+
+def _write(write, *args, **kwargs) -> str:
+    builder = table.HtmlBuilder()
+    write(builder, *args, **kwargs)
+    return builder.getvalue()
+
 
 @staticmethods
-class Test_make_tr:
-    def test_returns_empty_list_if_row_contains_no_content_cells():
+class Test_write_tr:
+    def test_writes_nothing_if_row_contains_no_content_cells():
         row = _make_row('^ . . ^ . ^ ^ ^ .')
-        assert table._make_tr(row, headers=set(), row_num=1) == []
+        assert _write(table._write_tr, row, headers=set(), row_num=1) == ''
 
-    def test_returns_list_containing_tr_tag_otherwise():
+    def test_writes_tr_tag_otherwise():
         row = _make_row('foo bar baz')
-        assert table._make_tr(row, headers=set(), row_num=0) == ['<tr>\n    <td>foo</td>\n    <td>bar</td>\n    <td>baz</td>\n</tr>']
+        assert _write(table._write_tr, row, headers=set(), row_num=0) == '<tr>\n    <td>foo</td>\n    <td>bar</td>\n    <td>baz</td>\n</tr>'
 
 
 @staticmethods
-class Test_make_td:
-    def test_returns_empty_list_if_cell_is_caret():
+class Test_write_td:
+    def test_writes_nothing_if_cell_is_caret():
         cell = {'data': ['^'], 'rows': 1, 'cols': 1}
-        assert table._make_td(cell, headers=set(), row_num=1, col_num=1) == []
+        assert _write(table._write_td, cell, headers=set(), row_num=1, col_num=1) == ''
 
     def test_tag_is_th_if_row_0_and_cols_in_headers():
         cell = {'data': ['foo'], 'rows': 1, 'cols': 1}
-        assert table._make_td(cell, headers={'cols'}, row_num=0, col_num=1) == ['<th>foo</th>']
+        assert _write(table._write_td, cell, headers={'cols'}, row_num=0, col_num=1) == '<th>foo</th>'
 
     def test_tag_is_th_if_col_0_and_rows_in_headers():
         cell = {'data': ['foo'], 'rows': 1, 'cols': 1}
-        assert table._make_td(cell, headers={'rows'}, row_num=1, col_num=0) == ['<th>foo</th>']
+        assert _write(table._write_td, cell, headers={'rows'}, row_num=1, col_num=0) == '<th>foo</th>'
 
     def test_tag_has_rowspan_attribute_if_cell_spans_more_than_1_row():
         cell = {'data': ['foo'], 'rows': 3, 'cols': 1}
-        assert table._make_td(cell, headers=set(), row_num=1, col_num=1) == ['<td rowspan="3">foo</td>']
+        assert _write(table._write_td, cell, headers=set(), row_num=1, col_num=1) == '<td rowspan="3">foo</td>'
 
     def test_tag_has_colspan_attribute_if_cell_spans_more_than_1_row():
         cell = {'data': ['foo'], 'rows': 1, 'cols': 2}
-        assert table._make_td(cell, headers=set(), row_num=1, col_num=1) == ['<td colspan="2">foo</td>']
+        assert _write(table._write_td, cell, headers=set(), row_num=1, col_num=1) == '<td colspan="2">foo</td>'
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from pytest import raises
+from .utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src import aio, nodes, parse
+
+class SlowMarkup(parse.Markup):
+    def __init__(self) -> None:
+        super().__init__()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.most_running = 0
+
+    def parse(self, string: str, **kwargs) -> str:
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        return super().parse(string, **kwargs)
+
+
+class NoExecutor:
+    def submit(self, *args, **kwargs):
+        raise AssertionError('executor used')
+
+
+@staticmethods
+class Test_AsyncMarkup:
+    def test_output_matches_parse():
+        markup = parse.Markup()
+        source = '$div{a $p{b}} ' * 10
+        async_markup = aio.AsyncMarkup(markup, threshold=0)
+        assert asyncio.run(async_markup.parse(source, depth=1)) == markup.parse(source, depth=1)
+
+    def test_short_sources_are_parsed_inline():
+        async_markup = aio.AsyncMarkup(parse.Markup(), executor=NoExecutor())
+        assert asyncio.run(async_markup.parse('$p{a}')) == '<p>a</p>'
+
+    def test_limits_concurrent_parses():
+        markup = SlowMarkup()
+        async_markup = aio.AsyncMarkup(markup, limit=2, threshold=0)
+
+        async def main():
+            return await asyncio.gather(*(async_markup.parse(f'$p{{{i}}}') for i in range(6)))
+
+        assert asyncio.run(main()) == [f'<p>{i}</p>' for i in range(6)]
+        assert markup.most_running == 2
+
+    def test_parses_in_worker_processes():
+        markup = parse.Markup(compact=True)
+        markup.nodes['$']['foo'] = nodes.DescribeNode
+        source = '$div{a $foo{b | c}} ' * 10
+        with ProcessPoolExecutor(1) as executor:
+            async_markup = aio.AsyncMarkup(markup, threshold=0, executor=executor)
+            assert asyncio.run(async_markup.parse(source)) == markup.parse(source)
@@ -0,0 +1,53 @@
+import pytest
+from pytest import raises
+from .utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src import batch, nodes, parse
+
+class FooNode(nodes.Node):
+    tag = 'foo'
+
+
+class BrokenNode(nodes.Node):
+    tag = 'broken'
+
+    @staticmethod
+    def parse_data(data, kwargs):
+        raise RuntimeError('broken')
+
+
+markup = parse.Markup()
+markup.nodes['$']['foo'] = FooNode
+markup.nodes['$']['para'] = markup.nodes['$']['p']
+markup.nodes['$']['broken'] = BrokenNode
+
+
+@staticmethods
+class Test_describe_nodes:
+    def test_builtin_nodes_are_described_by_name():
+        description = batch.describe_nodes(markup.nodes)
+        assert description['$']['p'] == description['$']['para'] == ('$', 'p')
+        assert description['$']['foo'] is FooNode
+
+    def test_build_nodes_inverts_describe_nodes():
+        assert batch.build_nodes(batch.describe_nodes(markup.nodes)) == markup.nodes
+
+
+@staticmethods
+class Test_Markup_parse_many:
+    def test_results_are_in_input_order():
+        sources = [f'$p{{{i}}} $foo $para' for i in range(20)]
+        assert markup.parse_many(sources, workers=2, chunksize=3) == [markup.parse(source) for source in sources]
+
+    def test_passes_depth_and_kwargs_to_parse():
+        assert markup.parse_many(['$section{a / b}'], workers=1, depth=1, section_level='2') == ['    <section>\n        <h2>a</h2>\n        \n        b\n    </section>']
+
+    def test_failures_are_reported_without_stopping_the_batch():
+        results = markup.parse_many(['$p{a}', '$broken', '$p{b}'], workers=2)
+        assert results[0] == '<p>a</p>' and results[2] == '<p>b</p>'
+        assert isinstance(results[1], batch.BatchError)
+        assert results[1].index == 1
+        assert results[1].message == 'RuntimeError: broken'
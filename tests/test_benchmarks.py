@@ -0,0 +1,30 @@
+import pytest
+from pytest import raises
+from .utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.benchmarks import corpus, run
+from markup.src import parse
+
+@staticmethods
+class Test_make_corpus:
+    def test_is_deterministic_for_a_seed():
+        assert corpus.make_corpus(1, 0.01) == corpus.make_corpus(1, 0.01)
+        assert corpus.make_corpus(1, 0.01) != corpus.make_corpus(2, 0.01)
+
+    def test_documents_parse_without_errors():
+        markup = parse.Markup()
+        for source in corpus.make_corpus(0, 0.02).values():
+            assert 'class="error"' not in markup.parse(source)
+
+
+@staticmethods
+class Test_measure:
+    def test_reports_throughput_latency_and_memory():
+        result = run.measure(parse.Markup(), 'a $p{b} c', repeat=3)
+        assert result['size'] == 9
+        assert result['throughput'] > 0
+        assert set(result['latency']) == {'p50', 'p90', 'p99', 'min', 'max'}
+        assert result['peak_memory'] > 0
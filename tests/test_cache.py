@@ -0,0 +1,147 @@
+import sys
+import pytest
+from pytest import raises
+from .utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src import cache, nodes, parse
+
+@staticmethods
+class Test_RenderCache:
+    def test_counts_hits_and_misses():
+        cache_ = cache.RenderCache(10_000)
+        key = cache.make_key('foo', 0, {})
+        assert cache_.get(key) is None
+        cache_.put(key, 'bar')
+        assert cache_.get(key) == 'bar'
+        assert cache_.stats['hits'] == 1
+        assert cache_.stats['misses'] == 1
+
+    def test_evicts_least_recently_used_entries_when_over_size():
+        keys = [cache.make_key(str(i) * 50, 0, {}) for i in range(3)]
+        size = sum(map(sys.getsizeof, keys[0])) + sys.getsizeof('x' * 50)
+        cache_ = cache.RenderCache(2 * size)
+        for key in keys[:2]:
+            cache_.put(key, 'x' * 50)
+        cache_.get(keys[0])
+        cache_.put(keys[2], 'x' * 50)
+        assert list(cache_.entries) == [keys[0], keys[2]]
+        assert cache_.stats['evictions'] == 1
+        assert cache_.size <= cache_.max_size
+
+    def test_does_not_store_entries_larger_than_max_size():
+        cache_ = cache.RenderCache(10)
+        cache_.put(cache.make_key('foo', 0, {}), 'bar')
+        assert cache_.stats['entries'] == 0
+
+    def test_cleared_when_nodes_change():
+        nodes_ = nodes.Registry(nodes.make_nodes())
+        cache_ = cache.RenderCache(10_000)
+        cache_.check(nodes_)
+        cache_.put(cache.make_key('foo', 0, {}), 'bar')
+        cache_.check(nodes_)
+        assert cache_.stats['entries'] == 1
+        nodes_['$']['foo'] = nodes.DescribeNode
+        cache_.check(nodes_)
+        assert cache_.stats['entries'] == 0
+
+
+@staticmethods
+class Test_make_key:
+    def test_key_depends_on_string_depth_and_kwargs():
+        assert cache.make_key('a', 0, {'b': 'c'}) == cache.make_key('a', 0, {'b': 'c'})
+        assert cache.make_key('a', 0, {}) != cache.make_key('a', 1, {})
+        assert cache.make_key('a', 0, {}) != cache.make_key('a', 0, {'b': 'c'})
+
+    def test_returns_None_if_kwargs_unhashable():
+        assert cache.make_key('a', 0, {'b': ['c']}) is None
+
+
+@staticmethods
+class Test_Markup_cache:
+    def test_repeated_parses_hit_the_cache():
+        markup = parse.Markup(cache_size=100_000)
+        assert markup.parse('$p{foo}') == markup.parse('$p{foo}') == '<p>foo</p>'
+        assert markup.cache.stats['hits'] == 1
+
+    def test_registering_a_node_invalidates_the_cache():
+        markup = parse.Markup(cache_size=100_000)
+        assert markup.parse('$foo') == '<span class="error">&lt;Invalid node: $foo&gt;</span>'
+        markup.nodes['$']['foo'] = markup.nodes['$']['p']
+        assert markup.parse('$foo') == '<p></p>'
+
+    def test_cache_on_disk_is_shared_between_instances(tmp_path):
+        path = str(tmp_path / 'cache.db')
+        assert parse.Markup(cache_path=path).parse('$p{foo}') == '<p>foo</p>'
+        markup = parse.Markup(cache_path=path)
+        assert markup.parse('$p{foo}') == '<p>foo</p>'
+        assert markup.cache.stats['hits'] == 1
+
+    def test_no_cache_by_default():
+        assert parse.Markup().cache is None
+
+
+@staticmethods
+class Test_DiskCache:
+    def test_entries_persist_between_caches_on_the_same_file(tmp_path):
+        path = str(tmp_path / 'cache.db')
+        registry = nodes.Registry(nodes.make_nodes())
+        cache_ = cache.DiskCache(path)
+        cache_.check(registry)
+        cache_.put(cache.make_key('foo', 0, {}), 'bar')
+        other = cache.DiskCache(path)
+        other.check(registry)
+        assert other.get(cache.make_key('foo', 0, {})) == 'bar'
+        assert other.get(cache.make_key('foo', 1, {})) is None
+        assert other.stats['hits'] == other.stats['misses'] == 1
+
+    def test_entries_are_keyed_by_the_registered_nodes(tmp_path):
+        registry = nodes.Registry(nodes.make_nodes())
+        cache_ = cache.DiskCache(str(tmp_path / 'cache.db'))
+        cache_.check(registry)
+        cache_.put(cache.make_key('foo', 0, {}), 'bar')
+        registry['$']['foo'] = nodes.DescribeNode
+        cache_.check(registry)
+        assert cache_.get(cache.make_key('foo', 0, {})) is None
+        del registry['$']['foo']
+        cache_.check(registry)
+        assert cache_.get(cache.make_key('foo', 0, {})) == 'bar'
+
+    def test_evicts_least_recently_used_entries_when_over_size(tmp_path):
+        cache_ = cache.DiskCache(str(tmp_path / 'cache.db'), 200)
+        cache_.check(nodes.Registry(nodes.make_nodes()))
+        cache_.refresh = 0  # Every hit marks the entry as used
+        keys = [cache.make_key(str(i), 0, {}) for i in range(3)]
+        for key in keys[:2]:
+            cache_.put(key, 'x' * 50)
+        cache_.get(keys[0])
+        cache_.put(keys[2], 'x' * 50)
+        assert cache_.get(keys[0]) is not None
+        assert cache_.get(keys[1]) is None
+        assert cache_.stats['evictions'] == 1
+        assert cache_.stats['size'] <= 200
+
+    def test_can_be_shared_between_threads(tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+
+        registry = nodes.Registry(nodes.make_nodes())
+        cache_ = cache.DiskCache(str(tmp_path / 'cache.db'), 10_000)
+        cache_.check(registry)
+        def put(i: int) -> None:
+            cache_.put(cache.make_key(str(i), 0, {}), 'x' * 100)
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(put, range(200)))
+        stats = cache_.stats
+        assert stats['size'] <= 10_000
+        assert stats['entries'] + stats['evictions'] == 200
+
+
+@staticmethods
+class Test_fingerprint:
+    def test_depends_on_the_registered_nodes():
+        registry = nodes.Registry(nodes.make_nodes())
+        assert cache.fingerprint(registry) == cache.fingerprint(nodes.Registry(nodes.make_nodes()))
+        registry['$']['foo'] = nodes.DescribeNode
+        assert cache.fingerprint(registry) != cache.fingerprint(nodes.Registry(nodes.make_nodes()))
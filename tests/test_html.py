@@ -21,10 +21,74 @@ class Test_html:
     def test_places_each_content_item_on_new_line_with_indent_if_tag_is_block_tag():
         assert html.html('div', {}, ['foo', 'bar']) == '<div>\n    foo\n    bar\n</div>'
 
+    def test_block_contents_are_inline_without_blank_items_in_compact_mode():
+        token = html.COMPACT.set(True)
+        try:
+            assert html.html('div', {}, ['foo', '', 'bar']) == '<div>foo bar</div>'
+        finally:
+            html.COMPACT.reset(token)
+
     def test_joins_content_list_with_spaces_if_tag_is_not_void_or_block_tag():
         assert html.html('p', {}, ['foo', 'bar', 'and', 'baz']) == '<p>foo bar and baz</p>'
 
 
+@staticmethods
+class Test_HtmlBuilder:
+    def test_nested_elements_are_laid_out_as_by_html():
+        builder = html.HtmlBuilder()
+        builder.open('ul', {'id': 'x'})
+        builder.open('li')
+        builder.text('a\nb')
+        builder.close()
+        builder.open('div')
+        builder.close()
+        builder.text('')
+        builder.close()
+        assert builder.getvalue() == html.html('ul', {'id': 'x'}, [
+            html.html('li', {}, ['a\nb']),
+            html.html('div', {}, []),
+            '',
+        ])
+
+    def test_compact_blocks_are_inline_without_empty_items():
+        builder = html.HtmlBuilder(compact=True)
+        builder.open('div')
+        for item in ('a', '', 'b'):
+            builder.text(item)
+        builder.close()
+        assert builder.getvalue() == '<div>a b</div>'
+
+    def test_attributes_can_be_added_until_something_is_written_after_start_tag():
+        builder = html.HtmlBuilder()
+        builder.open('td')
+        builder.attr('rowspan', '2')
+        builder.attr('hidden', True)
+        builder.attr('colspan', None)
+        builder.text('a')
+        with raises(ValueError):
+            builder.attr('colspan', '2')
+        builder.close()
+        assert builder.getvalue() == '<td rowspan="2" hidden>a</td>'
+
+    def test_content_of_void_elements_is_not_written():
+        builder = html.HtmlBuilder()
+        builder.open('hr')
+        builder.open('p')
+        builder.text('a')
+        builder.close()
+        builder.close()
+        assert builder.getvalue() == '<hr />'
+
+    def test_drain_returns_output_since_last_drain():
+        builder = html.HtmlBuilder()
+        builder.open('div')
+        assert builder.drain() == '<div>'
+        builder.text('a')
+        assert builder.drain() == '\n    a'
+        builder.close()
+        assert builder.drain() == '\n</div>'
+
+
 @staticmethods
 class Test_format_attributes:
     def test_True_values_become_boolean_attributes():
@@ -49,3 +113,6 @@ class Test_indent:
         input = 'foo\nbar\nbaz'
         output = '        foo\n        bar\n        baz'
         assert html.indent(input, depth=2) == output
+
+    def test_indents_empty_lines_including_a_trailing_one():
+        assert html.indent('foo\n\nbar\n', depth=1) == '    foo\n    \n    bar\n    '
@@ -0,0 +1,35 @@
+import pytest
+from pytest import raises
+from .utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src import incremental
+
+def _segments(*spans):
+    return [(start, end, '', '') for start, end in spans]
+
+
+@staticmethods
+class Test_touched:
+    def test_includes_segments_overlapping_the_deleted_range():
+        segments = _segments((0, 3), (3, 6), (6, 9), (9, 12))
+        assert incremental.touched(segments, 4, 3) == (1, 3)
+
+    def test_includes_segments_ending_or_starting_at_the_edit():
+        segments = _segments((0, 3), (3, 6), (6, 9))
+        assert incremental.touched(segments, 3, 0) == (0, 2)
+
+
+@staticmethods
+class Test_make_segment:
+    def test_indents_after_newlines_and_resolves_escapes():
+        assert incremental.make_segment(0, 5, 'a\\n\nb', 1)[3] == 'a\n\n    b'
+
+
+@staticmethods
+class Test_ParseState:
+    def test_output_is_indented_fragments():
+        state = incremental.ParseState('', 1, {}, [(0, 1, 'a', 'a'), (1, 2, 'b', 'b')])
+        assert state.output == '    ab'
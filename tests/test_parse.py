@@ -5,7 +5,7 @@ from .utils import staticmethods
 skip = pytest.mark.skip
 xfail = pytest.mark.xfail
 
-from markup.src import html, nodes, parse
+from markup.src import html, nodes, parse, tree
 
 class TestNode(nodes.Node):
     tag = 'test'
@@ -20,18 +20,227 @@ class ErrorNode(nodes.Node):
         raise nodes.MarkupError('This always errors')
 
 
+class UpperNode(nodes.Node):
+    tag = 'up'
+
+    def make_content(self, text: list[str]) -> list[str]:
+        return [t.upper() for t in text]
+
+
+class CountNode(nodes.Node):
+    def render(self, text: list[str]) -> str:
+        return str(len(''.join(text)))
+
+
+class PreNode(nodes.Node):
+    def __str__(self) -> str:
+        return '<pre>' + '|'.join(self.text) + '</pre>'
+
+
+class TitledNode(nodes.Node):
+    tag = 'div'
+
+    def make_attributes(self) -> html.Attributes:
+        return self.attributes | {'title': str(len(getattr(self, 'text')))}
+
+
+class CountedNode(nodes.Node):
+    tag = 'div'
+
+    def __init__(self, id: str='', classes: list[str]=None, data: html.Attributes=None, text: list[str]=None) -> None:
+        super().__init__(id, classes, data, text)
+        self.count = len(text or [])
+
+    def make_attributes(self) -> html.Attributes:
+        return self.attributes | {'data-count': str(self.count)}
+
+
 markup = parse.Markup()
 markup.nodes['$']['test'] = TestNode
 markup.nodes['$']['error'] = ErrorNode
+markup.nodes['$']['up'] = UpperNode
+markup.nodes['$']['count'] = CountNode
+markup.nodes['$']['pre'] = PreNode
+markup.nodes['$']['titled'] = TitledNode
+markup.nodes['$']['counted'] = CountedNode
 
 error_msg = '<span class="error">&lt;{}&gt;</span>'
 
 
+@staticmethods
+class Test_text_run:
+    def test_matches_run_of_ordinary_characters():
+        assert parse.text_run('', '', '$').match('abc def$ghi')[0] == 'abc def'
+
+    def test_stops_at_backslash_and_excluded_characters():
+        assert parse.text_run('', ']', '$').match(r'ab\c')[0] == 'ab'
+        assert parse.text_run('', ']', '$').match('ab]c')[0] == 'ab'
+
+    def test_only_matches_characters_in_alphabet_if_given():
+        assert parse.text_run('ab-', '', '$').match('a-bc')[0] == 'a-b'
+        assert parse.text_run('$', '', '$').match('$') is None
+
+
+@staticmethods
+class Test_split_top_level:
+    def test_splits_before_top_level_nodes_at_least_size_apart():
+        assert parse.split_top_level('a $p{b} $p{c} $p{d}', '$', 5) == [0, 8, 14, 19]
+
+    def test_ignores_nodes_inside_fields_quotes_and_escapes():
+        source = r'a $p{"}" $q} \$r $s'
+        assert parse.split_top_level(source, '$', 1) == [0, 2, 17, 19]
+
+    def test_returns_whole_source_if_no_nodes():
+        assert parse.split_top_level('abc', '$', 1) == [0, 3]
+        assert parse.split_top_level('', '$', 1) == [0, 0]
+
+
+@staticmethods
+class Test_Markup_parse_parallel:
+    def test_output_matches_parse():
+        source = '$section{A / $section{B / b} $p{c}}\n' * 20
+        assert markup.parse_parallel(source, workers=2, chunk_size=50, depth=1, section_level='2') == markup.parse(source, depth=1, section_level='2')
+
+    def test_recovers_from_misjudged_boundaries():
+        source = '$p{a} $test[foo "]" bar] $p{b}'
+        assert markup.parse_parallel(source, workers=2, chunk_size=1) == markup.parse(source)
+
+    def test_returns_error_if_document_is_malformed():
+        assert markup.parse_parallel('$p{a} $p{b', workers=2, chunk_size=1) == error_msg.format('Incomplete text field')
+
+    def test_parses_a_single_piece_without_workers(monkeypatch):
+        def parse_chunks(*args, **kwargs):
+            raise AssertionError('workers started')
+        monkeypatch.setattr(parse.batch, 'parse_chunks', parse_chunks)
+        assert markup.parse_parallel('$p{a} $p{b}', workers=2) == markup.parse('$p{a} $p{b}')
+
+
 @staticmethods
 class Test_Markup_parse:
     def test_resolves_escaping():
         assert markup.parse(r'\n\\\ \"') == '\n\\ "'
 
+    def test_parses_nesting_deeper_than_the_recursion_limit():
+        import sys
+        n = sys.getrecursionlimit() * 2
+        assert markup.parse('$test{' * n + '}' * n) == '<test>' * n + '</test>' * n
+
+    def test_nesting_depth_can_be_capped():
+        markup_ = parse.Markup(max_depth=2)
+        assert markup_.parse('$p{$p{a}}') == '<p><p>a</p></p>'
+        assert markup_.parse('$p{$p{$p{a}}}') == error_msg.format('Maximum nesting depth exceeded')
+
+    def test_capped_nesting_depth_counts_top_level_nodes_when_parsed_incrementally():
+        markup_ = parse.Markup(max_depth=2)
+        for source in ['$p{$p{a}}', '$p{$p{$p{a}}}']:
+            assert markup_.parse_state(source).output == markup_.parse(source)
+        with raises(parse.ParseError):
+            markup_.parse_node('$p{$p{$p{a}}}')
+
+    def test_nodes_are_registered_through_markup_nodes_after_assignment():
+        markup_ = parse.Markup()
+        table = nodes.make_nodes()
+        markup_.nodes = table
+        table['$']['foo'] = TestNode
+        assert markup_.parse('$foo') == error_msg.format('Invalid node: $foo')
+        markup_.nodes['$']['foo'] = TestNode
+        assert markup_.parse('$foo') == markup.parse('$test')
+
+    def test_compact_mode_has_no_indentation_or_newlines():
+        markup_ = parse.Markup(compact=True)
+        source = '$div{a $list{b / $div{c}}} $section{d / e}'
+        assert markup_.parse(source, depth=2) == '<div>a <ul><li>b</li> <li><div>c</div></li></ul></div> <section><h1>d</h1> e</section>'
+        assert ''.join(markup_.parse_iter(source)) == markup_.parse(source)
+
+    def test_parses_long_documents():
+        assert markup.parse('a $test{b} ' * 1000) == 'a <test>b</test> ' * 1000
+
+    def test_nodes_that_change_their_text_see_nested_elements_rendered():
+        assert markup.parse('$up{a $p{b} c}') == '<up>A <P>B</P> C</up>'
+        assert markup.parse('$count{$em{x}}') == '10'
+
+    def test_nodes_that_use_their_own_text_are_given_it():
+        assert markup.parse('$pre{a b $em{c}}') == '<pre>a|b|<em>c</em></pre>'
+        assert markup.parse('$titled{a b}') == '<div title="2">\n    a\n    b\n</div>'
+        assert markup.parse('$counted{a b}') == '<div data-count="2">\n    a\n    b\n</div>'
+        assert ''.join(markup.parse_iter('$pre{a b}')) == '<pre>a|b</pre>'
+
+
+@staticmethods
+class Test_Markup_parse_iter:
+    def test_chunks_join_to_parse_output():
+        source = 'a $div{b $p{c} $div{d\\n}} $list{e / f}'
+        chunks = list(markup.parse_iter(source, depth=1))
+        assert len(chunks) > 1
+        assert ''.join(chunks) == markup.parse(source, depth=1)
+
+    def test_yields_single_error_if_document_is_malformed():
+        assert list(markup.parse_iter('$test{')) == [error_msg.format('Incomplete text field')]
+
+
+@staticmethods
+class Test_Markup_render_to:
+    def test_writes_output_to_file():
+        import io
+        fp = io.StringIO()
+        markup.render_to('$div{a $p{b}}', fp)
+        assert fp.getvalue() == '<div>\n    a\n    <p>b</p>\n</div>'
+
+
+@staticmethods
+class Test_Markup_parse_tree:
+    def test_text_runs_are_strings():
+        assert markup.parse_tree('foo bar') == ['foo bar']
+
+    def test_nodes_are_elements_with_text_parts():
+        assert markup.parse_tree('a $test.foo{b "c $test d"} e') == [
+            'a ',
+            tree.Element(TestNode('', ['foo']), [['b'], ['c ', tree.Element(TestNode()), ' d']]),
+            ' e',
+        ]
+
+    def test_node_errors_are_error_markers():
+        assert markup.parse_tree('$foo $error') == [tree.Error('Invalid node: $foo'), ' ', tree.Error('This always errors')]
+
+    def test_raises_ParseError_if_document_is_malformed():
+        with raises(parse.ParseError):
+            markup.parse_tree('$test{foo')
+
+    def test_escapes_in_text_written_unchanged_are_resolved():
+        document = markup.parse_tree(r'a\$\\b\nc $div{d\}} $describe{e\|}')
+        assert document == ['a$\\b', '\n', 'c ', tree.Element(nodes.make_nodes()['$']['div'](), [['d}']]), ' ', tree.Element(nodes.DescribeNode(), [['e\\|']])]
+        assert type(document[0]) is tree.Text and type(document[1]) is tree.RawText
+        assert type(document[5].text[0][0]) is str
+
+
+@staticmethods
+class Test_Markup_reparse:
+    def test_output_matches_full_parse_after_edit():
+        state = markup.parse_state('a $test{b} c $test{d}', depth=1)
+        state = markup.reparse(state, 8, 1, 'x $test')
+        assert state.source == 'a $test{x $test} c $test{d}'
+        assert state.output == markup.parse(state.source, depth=1)
+
+    def test_reuses_segments_outside_the_edit():
+        state = markup.parse_state('$test{a} b $test{c} d $test{e}')
+        new_state = markup.reparse(state, 17, 1, 'x')
+        assert new_state.segments[0] is state.segments[0]
+        assert new_state.segments[-1][2] is state.segments[-1][2]
+        assert new_state.output == markup.parse('$test{a} b $test{x} d $test{e}')
+
+    def test_edits_can_change_node_extents():
+        state = markup.parse_state('$test{a} b $test{c}')
+        state = markup.reparse(state, 7, 1, '')
+        assert state.output == markup.parse('$test{a b $test{c}')
+        state = markup.reparse(state, 6, 0, '}')
+        assert state.output == markup.parse('$test{}a b $test{c}')
+
+    def test_parse_errors_replace_output_until_fixed():
+        state = markup.reparse(markup.parse_state('$test{a}'), 7, 1, '')
+        assert state.output == error_msg.format('Incomplete text field')
+        state = markup.reparse(state, 7, 0, '}')
+        assert state.output == '<test>a</test>'
+
 
 @staticmethods
 class Test_Markup_parse_string:
@@ -78,6 +287,9 @@ class Test_Markup_parse_node:
         with raises(parse.ParseError):
             markup.parse_node('$test. ')
 
+    def test_returns_remainder_after_text_field():
+        assert markup.parse_node('$test{foo}bar') == ('<test>foo</test>', 'bar')
+
     def test_multiple_ids_are_not_accepted():
         assert markup.parse_node('$test#foo#bar') == ('<test id="foo"></test>', '#bar')
 
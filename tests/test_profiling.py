@@ -0,0 +1,51 @@
+import pytest
+from pytest import raises
+from .utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src import nodes, parse, profiling
+
+@staticmethods
+class Test_Profiler:
+    def test_output_is_unchanged_by_profiling():
+        source = '$div{a $p{b \\n} $list{c / $em{d}}} $table{e | < / f | g}'
+        markup = parse.Markup(profiler=profiling.Profiler())
+        assert markup.parse(source, depth=1) == parse.Markup().parse(source, depth=1)
+        assert ''.join(markup.parse_iter(source)) == parse.Markup().parse(source)
+
+    def test_counts_calls_and_output_bytes_per_node_class():
+        profiler = profiling.Profiler()
+        markup = parse.Markup(profiler=profiler)
+        output = markup.parse('a $em{b} $em{c} $strong{é}')
+        stats = profiler.stats
+        em, strong = markup.nodes['$']['em'], markup.nodes['$']['strong']
+        assert stats[em].calls == 2
+        assert stats[em].output_bytes == len('<em>b</em><em>c</em>')
+        assert stats[strong].output_bytes == len('<strong>é</strong>'.encode())
+        assert stats[None].output_bytes == len(output.encode())
+
+    def test_nested_elements_of_the_same_class_are_counted_once_in_totals():
+        profiler = profiling.Profiler()
+        markup = parse.Markup(profiler=profiler)
+        output = markup.parse('$em{a $em{b}}')
+        stats = profiler.stats[markup.nodes['$']['em']]
+        assert stats.calls == 2
+        assert stats.output_bytes == len(output)
+        assert stats.render_total <= profiler.stats[None].render_total
+
+    def test_total_time_includes_nested_elements():
+        profiler = profiling.Profiler()
+        markup = parse.Markup(profiler=profiler)
+        markup.parse('$div{' + '$p{a} ' * 100 + '}')
+        div, p = profiler.stats[markup.nodes['$']['div']], profiler.stats[markup.nodes['$']['p']]
+        assert div.render_total >= div.render_self + p.render_total
+
+    def test_report_is_sorted_by_self_time():
+        profiler = profiling.Profiler()
+        parse.Markup(profiler=profiler).parse('$table{a | b} $p{c}')
+        report = profiler.report()
+        assert {row['node'] for row in report} == {'(document)', 'TableNode', 'PNode'}
+        assert [row['self_time'] for row in report] == sorted((row['self_time'] for row in report), reverse=True)
+        assert len(profiler.format().splitlines()) == 4
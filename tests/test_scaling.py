@@ -0,0 +1,56 @@
+import pytest
+from pytest import raises
+from .utils import growth_exponent, staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src import nodes, parse, utils
+from markup.src.nodes import table
+
+# Fitted exponents are noisy, so a path only fails once it's clearly in a
+# worse complexity class than declared
+LINEAR = 1.4
+
+markup = parse.Markup()
+
+def parse_exponent(make_source, sizes=(2000, 4000, 8000, 16000)):
+    return growth_exponent(make_source, markup.parse, sizes)
+
+
+@staticmethods
+class Test_parse_scaling:
+    def test_text_with_nodes_is_linear():
+        assert parse_exponent(lambda n: 'abc $em{def} ' * n, sizes=(1000, 2000, 4000, 8000)) < LINEAR
+
+    def test_escapes_are_linear():
+        assert parse_exponent(lambda n: r'a\$b\\c\n ' * n) < LINEAR
+
+    def test_node_data_is_linear():
+        assert parse_exponent(lambda n: '$link[' + '"a b" c ' * n + ']') < LINEAR
+
+    def test_nesting_is_linear():
+        assert parse_exponent(lambda n: '$em{a ' * n + '}' * n, sizes=(500, 1000, 2000, 4000)) < LINEAR
+
+
+@staticmethods
+class Test_partition_scaling:
+    def test_is_linear_in_number_of_parts():
+        exponent = growth_exponent(
+            lambda n: ['a', ' ', '/', ' '] * n,
+            lambda strings: utils.partition(strings, '/'),
+            (500, 1000, 2000, 4000),
+        )
+        assert exponent < LINEAR
+
+
+@staticmethods
+class Test_merge_rows_scaling:
+    def test_is_linear_in_number_of_rows():
+        # A column merged all the way down, next to a column of ordinary cells
+        exponent = growth_exponent(
+            lambda n: [[['a'], ['b']]] + [[['^'], ['b']]] * n,
+            lambda rows: list(table._merge_rows(rows)),
+            (200, 400, 800, 1600),
+        )
+        assert exponent < LINEAR
@@ -0,0 +1,51 @@
+import pytest
+from pytest import raises
+from .utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src import nodes, parse, serialize, tree
+
+@staticmethods
+class Test_Markup_dumps:
+    def test_loaded_tree_renders_as_the_source_does():
+        markup = parse.Markup()
+        source = 'a\\nb $div#x.y{c\\\\ $list[start=2]{d / e\\/f}} $foo $table{g | h}'
+        document = markup.loads(markup.dumps(source))
+        assert document == markup.parse_tree(source)
+        assert markup.render_tree(document, depth=1) == markup.parse(source, depth=1)
+
+    def test_keeps_how_text_is_written():
+        markup = parse.Markup()
+        document = markup.loads(markup.dumps('a\\nb $list{c\\/}'))
+        assert [type(child) for child in document] == [tree.Text, tree.RawText, tree.Text, tree.Element]
+        assert type(document[3].text[0][0]) is str
+
+    def test_serializes_nesting_deeper_than_the_recursion_limit():
+        import sys
+        markup = parse.Markup()
+        n = sys.getrecursionlimit() * 2
+        source = '$div{' * n + 'x' + '}' * n
+        assert markup.render_tree(markup.loads(markup.dumps(source))) == markup.parse(source)
+
+
+@staticmethods
+class Test_loads:
+    def test_rejects_documents_serialized_with_other_nodes():
+        markup = parse.Markup()
+        data = markup.dumps('$p{a}')
+        markup.nodes['$']['foo'] = nodes.DescribeNode
+        with raises(ValueError, match='other nodes'):
+            markup.loads(data)
+
+    def test_rejects_other_format_versions():
+        import marshal
+        registry = nodes.Registry(nodes.make_nodes())
+        data = marshal.dumps((serialize.MAGIC, serialize.VERSION + 1, '', b''))
+        with raises(ValueError, match='format version'):
+            serialize.loads(data, registry)
+
+    def test_rejects_other_data():
+        with raises(ValueError, match='not a serialized document'):
+            serialize.loads(b'foo', nodes.Registry(nodes.make_nodes()))
@@ -0,0 +1,54 @@
+import pytest
+from pytest import raises
+from .utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src import parse, template, tree
+
+markup = parse.Markup()
+
+@staticmethods
+class Test_Markup_compile:
+    def test_variables_are_rendered_as_literal_text():
+        compiled = markup.compile('a %x $p{b %x}')
+        assert compiled.names == {'x'}
+        assert compiled.render({'x': '$em{c}\\n'}) == 'a $em{c}\\n <p>b $em{c}\\n</p>'
+
+    def test_variables_in_nodes_that_read_their_text_cannot_add_separators():
+        compiled = markup.compile('$list{%x / b}')
+        assert compiled.render({'x': 'a / c'}) == '<ul>\n    <li>a / c</li>\n    <li>b</li>\n</ul>'
+
+    def test_values_are_indented_to_depth():
+        compiled = markup.compile('$div{%x}', depth=1)
+        assert compiled.render({'x': 'a\nb'}) == '    <div>\n        a\n        b\n    </div>'
+
+    def test_marker_is_literal_in_data_fields():
+        assert markup.compile('$link[%x]').render({}) == '<a href="%x">%x</a>'
+
+    def test_marker_can_be_escaped_or_changed():
+        assert markup.compile('\\%x').render({}) == '%x'
+        assert markup.compile('%x @x', marker='@').render({'x': 'a'}) == '%x a'
+
+    def test_marker_not_followed_by_a_name_is_literal():
+        assert markup.compile('50% off %x%').render({'x': 'a'}) == '50% off a%'
+        assert markup.compile('$p{100%}').render({}) == '<p>100%</p>'
+
+    def test_marker_must_not_be_special():
+        with raises(ValueError):
+            markup.compile('', marker='$')
+        with raises(ValueError):
+            markup.compile('', marker='{')
+
+    def test_parse_errors_are_rendered_as_error_spans():
+        assert markup.compile('$p{%x').render({}) == tree.error('Incomplete text field')
+
+
+@staticmethods
+class Test_compile_template:
+    def test_only_variables_and_elements_containing_them_are_left_to_render():
+        compiled = markup.compile('a $p{b %x} $list{%x} $list{c}')
+        assert isinstance(compiled, template.Template)
+        assert [type(chunk) is str for chunk in compiled.chunks] == [True, False, True, False, True]
+        assert isinstance(compiled.chunks[3].child, tree.Element)
@@ -0,0 +1,82 @@
+import pytest
+from pytest import raises
+from .utils import staticmethods
+
+skip = pytest.mark.skip
+xfail = pytest.mark.xfail
+
+from markup.src import nodes, tree
+
+class FooNode(nodes.Node):
+    tag = 'div'
+
+
+class SpanNode(nodes.Node):
+    tag = 'span'
+
+    def make_content(self, text: list[str]) -> list[str]:
+        return text
+
+
+class BadNode(nodes.Node):
+    tag = 'p'
+
+    def make_content(self, text: list[str]) -> list[str]:
+        raise nodes.MarkupError('Bad content')
+
+
+@staticmethods
+class Test_render:
+    def test_renders_text_elements_and_errors():
+        document = ['a ', tree.Element(nodes.DescribeNode(), [['b']]), tree.Error('c')]
+        assert tree.render(document) == 'a <dl>\n    <dt>b</dt>\n</dl><span class="error">&lt;c&gt;</span>'
+
+    def test_renders_nested_elements_inside_parts():
+        document = [tree.Element(FooNode(), [['x', tree.Element(FooNode(), [['y']])]])]
+        assert tree.render(document) == '<div>\n    x<div>\n        y\n    </div>\n</div>'
+
+    def test_indents_to_depth_and_resolves_escapes():
+        assert tree.render(['a\n\\$b'], depth=1) == '    a\n    $b'
+
+    def test_writes_resolved_text_without_unescaping():
+        assert tree.render([tree.Text('a\n\\$b'), tree.RawText('\n'), tree.Text('c')], depth=1) == '    a\n    \\$b\nc'
+
+    def test_renders_nesting_deeper_than_the_recursion_limit():
+        import sys
+        n = sys.getrecursionlimit() * 2
+        document = ['x']
+        for _ in range(n):
+            document = [tree.Element(SpanNode(), [document])]
+        assert tree.render_element(document[0]) == '<span>' * n + 'x' + '</span>' * n
+
+    def test_errors_raised_while_rendering_become_error_spans():
+        assert tree.render([tree.Element(BadNode())]) == '<span class="error">&lt;Bad content&gt;</span>'
+
+
+@staticmethods
+class Test_iter_render:
+    def test_streams_nodes_that_render_text_unchanged():
+        document = [tree.Element(FooNode(), [['x'], ['y']])]
+        assert list(tree.iter_render(document)) == ['<div>\n    ', 'x', '\n    ', 'y', '\n</div>']
+
+    def test_renders_other_nodes_whole():
+        document = [tree.Element(nodes.DescribeNode(), [['b']])]
+        assert list(tree.iter_render(document, depth=1)) == ['    ', '<dl>\n        <dt>b</dt>\n    </dl>']
+
+    def test_writes_elements_nested_in_other_nodes_at_their_indentation():
+        document = [tree.Element(nodes.ListNode(), [['a'], ['/'], [tree.Element(FooNode(), [['b']])]])]
+        assert tree.render(document, depth=1) == '    <ul>\n        <li>a</li>\n        <li><div>\n            b\n        </div></li>\n    </ul>'
+
+    def test_text_resembling_placeholders_is_written_literally():
+        document = [tree.Element(nodes.ListNode(), [['\x02\n0\x03'], [tree.Element(FooNode())]])]
+        assert tree.render(document) == '<ul>\n    <li>\x02\n    0\x03 <div>\n        \n    </div></li>\n</ul>'
+
+    def test_writes_tables_a_row_at_a_time():
+        document = [tree.Element(nodes.TableNode(data={'headers': ''}), [['a'], ['/'], ['b'], ['/'], [tree.Element(FooNode())]])]
+        chunks = list(tree.iter_render(document))
+        assert chunks[:3] == ['<table>', '\n    <tr>\n        <td>a</td>\n    </tr>', '\n    <tr>\n        <td>b</td>\n    </tr>']
+        assert ''.join(chunks) == '<table>\n    <tr>\n        <td>a</td>\n    </tr>\n    <tr>\n        <td>b</td>\n    </tr>\n    <tr>\n        <td><div>\n            \n        </div></td>\n    </tr>\n</table>'
+
+    def test_table_errors_replace_the_whole_table():
+        document = [tree.Element(nodes.TableNode(data={'headers': ''}), [['a'], ['/'], ['^'], ['|'], ['b']])]
+        assert tree.render(document) == tree.error('Table rows must be the same size')
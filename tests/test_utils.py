@@ -26,6 +26,19 @@ class Test_partition:
         assert utils.partition(strings, '2') == [['1'], ['3']]
 
 
+@staticmethods
+class Test_ipartition:
+    def test_strips_each_sublist():
+        assert list(utils.ipartition([' ', '1', ' ', '2', ' ', '3', ' '], '2')) == [['1'], ['3']]
+        assert list(utils.ipartition(['2', ' ', '2'], '2')) == [[], [], []]
+        assert list(utils.ipartition([], '2')) == [[]]
+
+    def test_is_lazy():
+        parts = utils.ipartition(['1', '2', '3', '2', '4'], '2')
+        assert next(parts) == ['1']
+        assert list(parts) == [['3'], ['4']]
+
+
 @staticmethods
 class Test_strip:
     def test_removes_leading_and_trailing_whitespace_from_list():
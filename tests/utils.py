@@ -8,3 +8,20 @@ def staticmethods(cls):
         if type(value) is _Function:
             setattr(cls, attr, staticmethod(value))
     return cls
+
+
+def growth_exponent(make_input, run, sizes, repeat=3):
+    """Fit the exponent k of run's time ~ size**k over the given sizes."""
+    import math, time
+    xs, ys = [], []
+    for size in sizes:
+        arg = make_input(size)
+        best = math.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run(arg)
+            best = min(best, time.perf_counter() - start)
+        xs.append(math.log(size))
+        ys.append(math.log(best))
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    return sum((x-mx) * (y-my) for x, y in zip(xs, ys)) / sum((x-mx) ** 2 for x in xs)